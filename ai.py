@@ -1,55 +1,580 @@
-import random
-from collections import deque
-from settings import CELL_SIZE, WIDTH, HEIGHT
-
-def ai_move(snake, food, obstacles, other_snake_body=None):
-    head = snake.body[0]
-    
-    # Simple BFS to find the shortest path to food avoiding obstacles and snakes
-    def get_path(start, target):
-        queue = deque([(start, [])])
-        visited = {start}
-        
-        # Combine all collision points
-        all_obstacles = set(obstacles) | set(snake.body[1:])
-        if other_snake_body:
-            all_obstacles |= set(other_snake_body)
-            
-        while queue:
-            (cx, cy), path = queue.popleft()
-            
-            if (cx, cy) == target:
-                return path
-                
-            for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
-                nx, ny = cx + dx * CELL_SIZE, cy + dy * CELL_SIZE
-                
-                if (0 <= nx < WIDTH and 0 <= ny < HEIGHT and 
-                    (nx, ny) not in all_obstacles and 
-                    (nx, ny) not in visited):
-                    
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [(dx, dy)]))
-        return None
-
-    path = get_path(head, food)
-    
-    if path:
-        snake.next_direction = path[0]
-    else:
-        # If no path to food, try to move to any safe neighbor
-        all_obstacles = set(obstacles) | set(snake.body[1:])
-        if other_snake_body:
-            all_obstacles |= set(other_snake_body)
-            
-        safe_moves = []
-        for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
-            nx, ny = head[0] + dx * CELL_SIZE, head[1] + dy * CELL_SIZE
-            if (0 <= nx < WIDTH and 0 <= ny < HEIGHT and (nx, ny) not in all_obstacles):
-                safe_moves.append((dx, dy))
-        
-        if safe_moves:
-            snake.next_direction = random.choice(safe_moves)
-        else:
-            # Game over for AI soon, but try to keep moving
-            pass 
\ No newline at end of file
+import heapq
+import random
+from collections import deque
+from itertools import islice
+from time import perf_counter_ns
+from settings import COLS, ROWS
+from snake import PACK_SHIFT, PACK_MASK
+
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+# Stamp of the padding around the board: newer than any search generation, so
+# border cells always read as blocked
+BORDER = 1 << 62
+
+# Boards up to this many cells get a precomputed neighbour table (the fastest
+# lookup); bigger ones compute neighbours on demand so memory stays flat
+NEIGHBOUR_TABLE_CELLS = 256 * 256
+
+class Neighbours:
+    # neighbours[cell] without the table: the 4 cells around it, in
+    # DIRECTIONS order
+    __slots__ = ("stride",)
+
+    def __init__(self, stride):
+        self.stride = stride
+
+    def __getitem__(self, cell):
+        stride = self.stride
+        return (cell - stride, cell + stride, cell - 1, cell + 1)
+
+class GridSearch:
+    # BFS over flat cell indices with buffers allocated once per board size.
+    # The board is padded with a one-cell border: cell (x, y) is
+    # (y + 1) * stride + x + 1 with stride = cols + 2, so the border,
+    # permanently blocked, stops searches without bounds checks. Blocked and
+    # visited cells are marked with generation stamps, so starting a new
+    # search never has to clear anything, and the search keeps parent
+    # pointers instead of copying paths into the queue.
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.stride = stride = cols + 2
+        self.size = size = stride * (rows + 2)
+        self.blocked = [0] * size
+        self.visited = [0] * size
+        self.parent = [0] * size
+        self.queue = [0] * size
+        self.generation = 0
+        self.visit_generation = 0
+        # Obstacles stamped like the border by set_walls
+        self.walls = None
+
+        # Neighbours of every cell in DIRECTIONS order, border cells included
+        self.neighbours = Neighbours(stride)
+        if cols * rows <= NEIGHBOUR_TABLE_CELLS:
+            around = self.neighbours
+            self.neighbours = [()] * size
+            for y in range(rows):
+                for cell in range((y + 1) * stride + 1, (y + 2) * stride - 1):
+                    self.neighbours[cell] = around[cell]
+        for cell in self.border():
+            self.blocked[cell] = BORDER
+
+    def border(self):
+        stride, size = self.stride, self.size
+        yield from range(stride)
+        yield from range(size - stride, size)
+        for row in range(stride, size - stride, stride):
+            yield row
+            yield row + stride - 1
+
+    def begin(self):
+        # Forget everything blocked by the previous caller (walls stay)
+        self.generation += 1
+
+    def set_walls(self, obstacles):
+        # Block obstacles for good, the way the border is, so callers planning
+        # every tick against a round's obstacles only pay for them once. The
+        # same object (never changed in place) is a no-op; anything else
+        # replaces the previous walls.
+        if obstacles is self.walls:
+            return
+        blocked, stride = self.blocked, self.stride
+        cols, rows = self.cols, self.rows
+        if self.walls is not None:
+            for x, y in self.walls:
+                if 0 <= x < cols and 0 <= y < rows:
+                    blocked[(y + 1) * stride + x + 1] = 0
+        for x, y in obstacles:
+            if 0 <= x < cols and 0 <= y < rows:
+                blocked[(y + 1) * stride + x + 1] = BORDER
+        self.walls = obstacles
+
+    def cell(self, pos):
+        return (pos[1] + 1) * self.stride + pos[0] + 1
+
+    def pos(self, cell):
+        return (cell % self.stride - 1, cell // self.stride - 1)
+
+    def block(self, positions):
+        blocked, generation, stride = self.blocked, self.generation, self.stride
+        cols, rows = self.cols, self.rows
+        for x, y in positions:
+            # Never overwrite a wall's stamp (a head that just crashed into one)
+            if 0 <= x < cols and 0 <= y < rows and blocked[(y + 1) * stride + x + 1] < generation:
+                blocked[(y + 1) * stride + x + 1] = generation
+
+    def is_free(self, cell):
+        return self.blocked[cell] < self.generation
+
+    def direction(self, src, dst):
+        # Unit step between two neighbouring cells
+        delta = dst - src
+        if delta == 1:
+            return (1, 0)
+        if delta == -1:
+            return (-1, 0)
+        return (0, 1) if delta > 0 else (0, -1)
+
+    def first_step(self, start, target):
+        # Cell to move into from start on a shortest path to target, or None
+        if start == target:
+            return None
+        self.visit_generation += 1
+        stamp = self.visit_generation
+        blocked, generation = self.blocked, self.generation
+        visited, parent, queue, neighbours = self.visited, self.parent, self.queue, self.neighbours
+
+        visited[start] = stamp
+        queue[0] = start
+        head, tail = 0, 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            for nxt in neighbours[current]:
+                if visited[nxt] == stamp or blocked[nxt] >= generation:
+                    continue
+                visited[nxt] = stamp
+                parent[nxt] = current
+                if nxt == target:
+                    # Walk back only until the cell next to the start
+                    while current != start:
+                        nxt, current = current, parent[current]
+                    return nxt
+                queue[tail] = nxt
+                tail += 1
+        return None
+
+_searches = {}
+
+def get_search(cols=COLS, rows=ROWS):
+    # One shared searcher per board size
+    search = _searches.get((cols, rows))
+    if search is None:
+        search = _searches[(cols, rows)] = GridSearch(cols, rows)
+    return search
+
+def ai_move(snake, food, obstacles, other_snake_body=None, rng=random, cols=COLS, rows=ROWS):
+    search = get_search(cols, rows)
+
+    # Combine all collision points once, for both the path and the fallback
+    search.begin()
+    search.set_walls(obstacles)
+    search.block(islice(snake.body, 1, None))
+    if other_snake_body:
+        search.block(other_snake_body)
+
+    head = search.cell(snake.body[0])
+    step = search.first_step(head, search.cell(food))
+
+    if step is not None:
+        snake.next_direction = search.direction(head, step)
+    else:
+        # If no path to food, try to move to any safe neighbor
+        safe_moves = [search.direction(head, nxt) for nxt in search.neighbours[head] if search.is_free(nxt)]
+
+        if safe_moves:
+            snake.next_direction = rng.choice(safe_moves)
+        else:
+            # Game over for AI soon, but try to keep moving
+            pass
+
+INF = 1 << 30
+
+class DistanceField:
+    # Shortest-path distance from the food to every free cell, kept up to date
+    # as snake segments occupy and vacate cells, so an AI tick only has to look
+    # at the 4 neighbours of its head. Obstacles and the food cell only change
+    # through reset() / set_food(), which trigger a full rebuild on next use.
+    def __init__(self, cols, rows):
+        self.grid = get_search(cols, rows)
+        self.neighbours = self.grid.neighbours
+        size = self.grid.size
+        self.dist = [INF] * size
+        # Walls: obstacles plus the border around the board
+        self.border = bytearray(size)
+        for cell in self.grid.border():
+            self.border[cell] = 1
+        self.wall = bytearray(self.border)
+        self.occupied = bytearray(size)  # snake segments per cell
+        self.food = None
+        self.valid = False
+
+    def reset(self, obstacles, bodies, food):
+        self.wall = bytearray(self.border)
+        self.occupied = bytearray(len(self.border))
+        for pos in obstacles:
+            self.wall[self.grid.cell(pos)] = 1
+        for body in bodies:
+            for pos in body:
+                self.occupy(pos)
+        self.set_food(food)
+
+    def set_food(self, food):
+        self.food = self.grid.cell(food)
+        self.valid = False
+
+    def inside(self, pos):
+        return 0 <= pos[0] < self.grid.cols and 0 <= pos[1] < self.grid.rows
+
+    def is_free(self, cell):
+        return not self.wall[cell] and not self.occupied[cell]
+
+    def occupy(self, pos):
+        if not self.inside(pos):
+            return
+        cell = self.grid.cell(pos)
+        self.occupied[cell] += 1
+        if self.occupied[cell] == 1 and self.valid:
+            if cell == self.food:
+                # Food is being eaten, a new one is about to be placed
+                self.valid = False
+            else:
+                self.raise_cell(cell)
+
+    def vacate(self, pos):
+        if not self.inside(pos):
+            return
+        cell = self.grid.cell(pos)
+        self.occupied[cell] -= 1
+        if self.occupied[cell] == 0 and self.valid and not self.wall[cell]:
+            self.lower_cell(cell)
+
+    def rebuild(self):
+        dist, neighbours, wall, occupied = self.dist, self.neighbours, self.wall, self.occupied
+        for i in range(len(dist)):
+            dist[i] = INF
+        dist[self.food] = 0
+        queue = deque([self.food])
+        while queue:
+            current = queue.popleft()
+            d = dist[current] + 1
+            for nxt in neighbours[current]:
+                if dist[nxt] > d and not wall[nxt] and not occupied[nxt]:
+                    dist[nxt] = d
+                    queue.append(nxt)
+        self.valid = True
+
+    def lower_cell(self, cell):
+        # A cell opened up: its distance can only shrink, and so can the
+        # distances of cells reached through it (a single BFS wave)
+        dist, neighbours, wall, occupied = self.dist, self.neighbours, self.wall, self.occupied
+        best = 0 if cell == self.food else min(dist[n] for n in neighbours[cell]) + 1
+        if best >= dist[cell]:
+            return
+        dist[cell] = best
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            d = dist[current] + 1
+            for nxt in neighbours[current]:
+                if dist[nxt] > d and not wall[nxt] and not occupied[nxt]:
+                    dist[nxt] = d
+                    queue.append(nxt)
+
+    def raise_cell(self, cell):
+        # A cell got blocked: drop every cell that has no neighbour one step
+        # closer to the food any more (level by level), then re-grow those
+        # cells from the surviving frontier
+        dist, neighbours, wall, occupied = self.dist, self.neighbours, self.wall, self.occupied
+        old = dist[cell]
+        dist[cell] = INF
+        if old == INF:
+            return
+
+        lost = []
+        queue = deque(n for n in neighbours[cell] if dist[n] == old + 1)
+        while queue:
+            current = queue.popleft()
+            d = dist[current]
+            if d == INF or any(dist[n] == d - 1 for n in neighbours[current]):
+                continue
+            dist[current] = INF
+            lost.append(current)
+            queue.extend(n for n in neighbours[current] if dist[n] == d + 1)
+
+        heap = []
+        for current in lost:
+            best = min(dist[n] for n in neighbours[current]) + 1
+            if best < INF:
+                dist[current] = best
+                heap.append((best, current))
+        heapq.heapify(heap)
+        while heap:
+            d, current = heapq.heappop(heap)
+            if d != dist[current]:
+                continue
+            d += 1
+            for nxt in neighbours[current]:
+                if dist[nxt] > d and not wall[nxt] and not occupied[nxt]:
+                    dist[nxt] = d
+                    heapq.heappush(heap, (d, nxt))
+
+    def best_step(self, cell):
+        # Free neighbour with the smallest finite distance to the food, or None
+        if not self.valid:
+            self.rebuild()
+        dist = self.dist
+        best, best_dist = None, INF
+        for nxt in self.neighbours[cell]:
+            if dist[nxt] < best_dist:
+                best, best_dist = nxt, dist[nxt]
+        return best
+
+def ai_move_field(snake, field, rng=random):
+    # Same decision as ai_move, read from an up-to-date DistanceField
+    grid = field.grid
+    head = grid.cell(snake.body[0])
+    step = field.best_step(head)
+
+    if step is not None:
+        snake.next_direction = grid.direction(head, step)
+    else:
+        safe_moves = [grid.direction(head, nxt) for nxt in field.neighbours[head] if field.is_free(nxt)]
+        if safe_moves:
+            snake.next_direction = rng.choice(safe_moves)
+
+# Per-tick planning budget of ai_move_anytime, in microseconds
+PLAN_BUDGET_US = 2000
+# The same budget counted in expanded cells instead of time (about as long
+# here), for headless games that must play out the same on every run
+PLAN_BUDGET_CELLS = 2048
+# Cells expanded between two reads of the clock
+CHECK_EVERY = 64
+
+class AnytimePlanner:
+    # Deadline-bounded planner, in three stages:
+    #   1. A* to the food (half the budget at most)
+    #   2. check that the snake could still reach its own tail after eating
+    #      there, so taking the food doesn't seal it in
+    #   3. otherwise flood-fill from every safe neighbour and take the one
+    #      with the most room, preferring ones where the tail is reachable
+    # Every stage watches the deadline; when it passes, the best move known
+    # so far is returned. The deadline is on the clock, or, given a budget in
+    # cells, on the count of expanded cells, which makes the plan depend only
+    # on the position. Blocked cells come from the shared GridSearch.
+    def __init__(self, cols, rows):
+        self.grid = get_search(cols, rows)
+        size = self.grid.size
+        self.cost = [0] * size
+        self.parent = [0] * size
+        self.seen = [0] * size
+        self.stamp = 0
+        self.cells = 0  # expanded so far, all plans together
+        self.budget_cells = None  # of the current plan, None for a time budget
+
+    def visit(self):
+        # Fresh stamp for the seen buffer
+        self.stamp += 1
+        return self.stamp
+
+    def spent(self, cells, deadline):
+        # Count cells more expanded cells; True once deadline has passed
+        self.cells += cells
+        if self.budget_cells:
+            return self.cells > deadline
+        return perf_counter_ns() > deadline
+
+    def astar(self, start, target, deadline):
+        # (path, complete): cells after start up to target, or when the
+        # deadline hits, up to the expanded cell closest to target
+        grid = self.grid
+        stride, neighbours, blocked, generation = grid.stride, grid.neighbours, grid.blocked, grid.generation
+        cost, parent, seen = self.cost, self.parent, self.seen
+        stamp = self.visit()
+        tx, ty = target % stride, target // stride
+
+        seen[start] = stamp
+        cost[start] = 0
+        closest, closest_h = start, abs(start % stride - tx) + abs(start // stride - ty)
+        heap = [(closest_h, closest_h, start)]
+        expanded = 0
+        complete = False
+        while heap:
+            _, h, current = heapq.heappop(heap)
+            g = cost[current]
+            if current == target:
+                closest, complete = current, True
+                break
+            if h < closest_h:
+                closest, closest_h = current, h
+            expanded += 1
+            if expanded % CHECK_EVERY == 0 and self.spent(CHECK_EVERY, deadline):
+                break
+            for nxt in neighbours[current]:
+                if blocked[nxt] >= generation:
+                    continue
+                if seen[nxt] != stamp or g + 1 < cost[nxt]:
+                    seen[nxt] = stamp
+                    cost[nxt] = g + 1
+                    parent[nxt] = current
+                    nh = abs(nxt % stride - tx) + abs(nxt // stride - ty)
+                    heapq.heappush(heap, (g + 1 + nh, nh, nxt))
+
+        self.cells += expanded % CHECK_EVERY
+        path = []
+        while closest != start:
+            path.append(closest)
+            closest = parent[closest]
+        path.reverse()
+        return path, complete
+
+    def tail_reachable(self, body, path, deadline):
+        # After following path (ending on the food, so the snake grows by one),
+        # is there a way from the new head back to the new tail? None when
+        # the deadline hit first. Only the len(path) cells that change hands
+        # are looked at; the rest of the body is still blocked in the grid.
+        grid = self.grid
+        neighbours, blocked, generation = grid.neighbours, grid.blocked, grid.generation
+        n, length = len(body), len(path)
+        if length <= n:
+            tail = body[n - length]
+            occupied = set(path)
+            occupied.add(body[0])
+            freed = set(body[n - length + 1:])
+        else:
+            tail = path[length - n - 1]
+            occupied = set(path[length - n:])
+            freed = set(body)
+
+        seen = self.seen
+        stamp = self.visit()
+        head = path[-1]
+        seen[head] = stamp
+        queue = deque([head])
+        expanded = 0
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            if expanded % CHECK_EVERY == 0 and self.spent(CHECK_EVERY, deadline):
+                return None
+            for nxt in neighbours[current]:
+                if nxt == tail:
+                    self.cells += expanded % CHECK_EVERY
+                    return True
+                if seen[nxt] == stamp or nxt in occupied:
+                    continue
+                if blocked[nxt] >= generation and nxt not in freed:
+                    continue
+                seen[nxt] = stamp
+                queue.append(nxt)
+        self.cells += expanded % CHECK_EVERY
+        return False
+
+    def room(self, start, tail, cap, deadline):
+        # (reaches_tail, free cells reachable from start, counted up to cap).
+        # A partial count when the deadline hits.
+        grid = self.grid
+        neighbours, blocked, generation = grid.neighbours, grid.blocked, grid.generation
+        seen = self.seen
+        stamp = self.visit()
+        seen[start] = stamp
+        queue = deque([start])
+        area = 0
+        reaches_tail = False
+        while queue and area < cap:
+            current = queue.popleft()
+            area += 1
+            if area % CHECK_EVERY == 0 and self.spent(CHECK_EVERY, deadline):
+                break
+            for nxt in neighbours[current]:
+                if nxt == tail:
+                    reaches_tail = True
+                if seen[nxt] != stamp and blocked[nxt] < generation:
+                    seen[nxt] = stamp
+                    queue.append(nxt)
+        self.cells += area % CHECK_EVERY
+        return reaches_tail, area
+
+    def plan(self, body, food, budget_us, rng=random, budget_cells=None):
+        # body: head-first cells, already blocked (except the head) in the
+        # grid. Returns the cell to move into, None if every neighbour is
+        # blocked. budget_cells, when given, replaces budget_us.
+        self.budget_cells = budget_cells
+        if budget_cells:
+            start = self.cells
+            deadline = start + budget_cells
+            halfway = start + budget_cells // 2
+        else:
+            start = perf_counter_ns()
+            deadline = start + budget_us * 1000
+            halfway = start + budget_us * 500
+        grid = self.grid
+        head = body[0]
+        moves = [nxt for nxt in grid.neighbours[head] if grid.is_free(nxt)]
+        if not moves:
+            return None
+        if len(moves) == 1:
+            return moves[0]
+        best = rng.choice(moves)
+
+        # 1 + 2: the food, if it can be eaten without losing the tail
+        path, complete = self.astar(head, food, halfway)
+        preferred = path[0] if path else None
+        if complete and path:
+            safe = self.tail_reachable(body, path, deadline)
+            if safe is None:
+                # Out of time: an unverified path still beats a random move
+                return preferred
+            if safe:
+                return preferred
+
+        # 3: the neighbour with the most room; ties go to the A* direction
+        tail = body[-1]
+        cap = 2 * len(body) + CHECK_EVERY
+        best_score = None
+        for move in moves:
+            if self.spent(0, deadline):
+                break
+            reaches_tail, area = self.room(move, tail, cap, deadline)
+            score = (reaches_tail or area >= cap, area, move == preferred)
+            if best_score is None or score > best_score:
+                best, best_score = move, score
+        return best
+
+_planners = {}
+
+def get_planner(cols=COLS, rows=ROWS):
+    planner = _planners.get((cols, rows))
+    if planner is None:
+        planner = _planners[(cols, rows)] = AnytimePlanner(cols, rows)
+    return planner
+
+def anytime_direction(cells, food, obstacles, other_snake_body=None, budget_us=PLAN_BUDGET_US, rng=random,
+                      cols=COLS, rows=ROWS, budget_cells=None):
+    # Direction ai_move_anytime picks for a snake with these (packed, head
+    # first) cells, None when it is boxed in. Needs no Snake, so it can run on
+    # a snapshot in another thread or process. The obstacles are stamped once
+    # per round (pass the same object every tick); setting up the rest of the
+    # blocked cells is still linear in the snake lengths.
+    planner = get_planner(cols, rows)
+    search = planner.grid
+    search.begin()
+    search.set_walls(obstacles)
+    if other_snake_body:
+        search.block(other_snake_body)
+
+    # Packed cells carry the same +1 offsets as the padded grid
+    stride = search.stride
+    body = [(cell >> PACK_SHIFT) * stride + (cell & PACK_MASK) for cell in cells]
+    blocked, generation = search.blocked, search.generation
+    for cell in islice(body, 1, None):
+        # As in block(): a body spawned over an obstacle keeps the wall stamp
+        if blocked[cell] < generation:
+            blocked[cell] = generation
+
+    step = planner.plan(body, search.cell(food), budget_us, rng, budget_cells)
+    if step is None:
+        return None
+    return search.direction(body[0], step)
+
+def ai_move_anytime(snake, food, obstacles, other_snake_body=None, budget_us=PLAN_BUDGET_US, rng=random,
+                    cols=COLS, rows=ROWS, budget_cells=None):
+    # Like ai_move, but avoids food it would get trapped at and never spends
+    # much more than budget_us (or budget_cells expanded cells) searching,
+    # whatever the board size
+    direction = anytime_direction(snake.cells, food, obstacles, other_snake_body, budget_us, rng, cols, rows,
+                                  budget_cells)
+    if direction is not None:
+        snake.next_direction = direction
@@ -0,0 +1,97 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from ai import DIRECTIONS, anytime_direction
+
+# Search budget off the render loop; an AI tick is 30-125 ms away
+BACKGROUND_BUDGET_US = 20000
+
+# Immutable copy of what changes between ticks: the AI's packed cells, food
+# and the other snake's body as tuples. Obstacles only change between rounds
+# and reach the worker once per round through load_round().
+Snapshot = namedtuple("Snapshot", "cells food round other_body budget_us cols rows")
+
+# (round number, obstacles) of the round being planned, in the worker
+current_round = (None, None)
+
+def load_round(number, obstacles):
+    # Runs in the worker ahead of the round's snapshots (one worker runs its
+    # tasks in order). Keeping the same object also lets the planner keep
+    # its wall stamps between ticks.
+    global current_round
+    current_round = (number, obstacles)
+
+def plan(snapshot):
+    # Runs in the worker thread or process
+    number, obstacles = current_round
+    if number != snapshot.round:
+        return None
+    return anytime_direction(snapshot.cells, snapshot.food, obstacles,
+                             snapshot.other_body, snapshot.budget_us,
+                             cols=snapshot.cols, rows=snapshot.rows)
+
+def safe_direction(engine, snake):
+    # Straight on when that cell is free, else the first free neighbour, else
+    # straight on anyway
+    field = engine.field
+    x, y = snake.body[0]
+    for dx, dy in [snake.direction] + DIRECTIONS:
+        pos = (x + dx, y + dy)
+        if field.inside(pos) and field.is_free(field.grid.cell(pos)):
+            return (dx, dy)
+    return snake.direction
+
+class AIWorker:
+    # Plans the AI snake's next move while frames are drawn. After every tick
+    # that changes what the AI sees (its own move, a respawn, new food) a
+    # snapshot goes to a single worker; at the AI's next tick its answer is
+    # used if it is ready and the cell it leads to is still free, otherwise
+    # safe_direction() stands in. "process" sidesteps the GIL for big boards,
+    # "thread" avoids pickling the snapshot.
+    def __init__(self, mode="thread", budget_us=BACKGROUND_BUDGET_US):
+        if mode == "process":
+            self.executor = ProcessPoolExecutor(1)
+        else:
+            self.executor = ThreadPoolExecutor(1)
+        self.budget_us = budget_us
+        self.future = None
+        self.key = None  # (snake, head cell, food) the pending plan is for
+        self.obstacles = None  # of the round the worker has, numbered self.round
+        self.round = 0
+
+    def refresh(self, engine):
+        # Start a new plan if the AI's situation changed since the last one
+        snake = engine.ai_snake
+        if snake is None or engine.over:
+            return
+        key = (snake, snake.cells[0], engine.food)
+        if key == self.key:
+            return
+        if self.future:
+            self.future.cancel()  # no-op once it is running, the result is ignored
+        if engine.obstacles is not self.obstacles:
+            # A new round: Engine.reset() makes a new set, never changed after
+            self.obstacles = engine.obstacles
+            self.round += 1
+            self.executor.submit(load_round, self.round, engine.obstacles)
+        self.key = key
+        self.future = self.executor.submit(plan, Snapshot(
+            tuple(snake.cells), engine.food, self.round,
+            tuple(engine.player.body), self.budget_us, engine.cols, engine.rows
+        ))
+
+    def next_direction(self, engine):
+        # Direction for the AI tick about to run
+        snake = engine.ai_snake
+        future = self.future
+        if future and future.done() and self.key[0] is snake and self.key[1] == snake.cells[0]:
+            direction = future.result()
+            if direction is not None:
+                x, y = snake.body[0]
+                pos = (x + direction[0], y + direction[1])
+                field = engine.field
+                if field.inside(pos) and field.is_free(field.grid.cell(pos)):
+                    return direction
+        return safe_direction(engine, snake)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,293 @@
+# Crowded headless arenas: dozens of snakes on one board, all moving on the
+# same tick.
+#   python arena.py --snakes 32 --cols 100 --rows 70
+# Collisions are resolved against one shared occupancy grid, and every AI
+# snake is planned from a single BFS out of the food cells, so a tick costs
+# O(board + snakes) however long and however many the snakes are.
+import argparse
+import random
+import time
+from collections import Counter
+
+from settings import COLS, ROWS, MAX_BOARD, PLAYER_COLOR, PLAYER_TAIL, AI_COLOR, AI_TAIL
+from snake import Snake, PACK_SHIFT, PACK_MASK, unpack_cell
+from ai import INF, get_search
+from engine import FreeCells, OPPOSITE, EAT, DIE, FULL, MIN_COLS, MIN_ROWS
+from level import generate_obstacles
+
+# Picks of a random free cell per spawn attempt before giving up for the tick
+SPAWN_TRIES = 20
+
+class Arena:
+    # Snakes 0 .. players-1 are steered through step() actions, the rest are
+    # AI. Dead AI snakes respawn at a random free spot on a later tick; the
+    # round is over once every player is dead (never, without players) or no
+    # food can be placed. Positions are (x, y) grid cells.
+    #
+    # The shared grid uses the padded cell layout of ai.GridSearch: wall is
+    # the border plus obstacles, occupied counts what covers each cell (a
+    # wall once, plus every snake segment on it).
+    def __init__(self, snakes=16, players=0, food_count=None, obstacle_count=None, seed=None,
+                 cols=COLS, rows=ROWS):
+        if not (MIN_COLS <= cols <= MAX_BOARD and MIN_ROWS <= rows <= MAX_BOARD):
+            raise ValueError(f"board must be {MIN_COLS}x{MIN_ROWS} to {MAX_BOARD}x{MAX_BOARD} cells, got {cols}x{rows}")
+        if not 0 <= players <= snakes:
+            raise ValueError(f"players must be between 0 and {snakes}, got {players}")
+        self.cols = cols
+        self.rows = rows
+        self.n_snakes = snakes
+        self.players = players
+        self.food_count = food_count or max(1, snakes // 4)
+        self.obstacle_count = obstacle_count
+        self.grid = get_search(cols, rows)
+        # BFS scratch buffers, stamped so a plan never has to clear them
+        self.dist = [INF] * self.grid.size
+        self.seen = [0] * self.grid.size
+        self.target = [0] * self.grid.size
+        self.queue = [0] * self.grid.size
+        self.stamp = 0
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        grid = self.grid
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.ai_rng = random.Random(self.rng.getrandbits(64))
+        self.obstacles = set(generate_obstacles(self.obstacle_count, self.rng, self.cols, self.rows))
+        self.wall = bytearray(grid.size)
+        for cell in grid.border():
+            self.wall[cell] = 1
+        for pos in self.obstacles:
+            self.wall[grid.cell(pos)] = 1
+        self.occupied = bytearray(self.wall)
+        self.free = FreeCells(self.cols, self.rows)
+        self.free.reset(self.obstacles, [])
+        self.causes = Counter()
+
+        self.snakes = [None] * self.n_snakes
+        self.scores = [0] * self.n_snakes
+        self.deaths = [0] * self.n_snakes
+        for i in range(self.n_snakes):
+            self.spawn(i)
+        self.foods = set()
+        for _ in range(self.food_count):
+            self.place_food()
+        self.ticks = 0
+        self.over = False
+        return self
+
+    def index(self, packed):
+        # Packed snake cells carry the same +1 offsets as the padded grid
+        return (packed >> PACK_SHIFT) * self.grid.stride + (packed & PACK_MASK)
+
+    def spawn(self, i):
+        # 3 cells heading right at a random free spot (food covers its cell in
+        # FreeCells too), False if none was found
+        free, cols = self.free, self.cols
+        for _ in range(SPAWN_TRIES):
+            pos = free.choice(self.rng)
+            if pos is None:
+                break
+            x, y = pos
+            if x < 2 or free.taken[y * cols + x - 1] or free.taken[y * cols + x - 2]:
+                continue
+            if i < self.players:
+                snake = Snake(x, y, PLAYER_COLOR, PLAYER_TAIL)
+            else:
+                snake = Snake(x, y, AI_COLOR, AI_TAIL, is_ai=True)
+            self.snakes[i] = snake
+            for cell in snake.cells:
+                self.occupied[self.index(cell)] += 1
+            for pos in snake.body:
+                free.take(pos)
+            return True
+        return False
+
+    def place_food(self):
+        # Foods cover their cell in FreeCells, so they never stack
+        pos = self.free.choice(self.rng)
+        if pos is None:
+            return False
+        self.foods.add(pos)
+        self.free.take(pos)
+        return True
+
+    def alive(self):
+        return [i for i, snake in enumerate(self.snakes) if snake is not None and snake.alive]
+
+    def plan(self, ids):
+        # Directions for the AI snakes in ids from one multi-source BFS out of
+        # every food over the shared grid. Occupied cells block the search
+        # (tails that move away this tick included), and the search stops as
+        # soon as every free cell next to a planned head has its distance.
+        grid, occupied = self.grid, self.occupied
+        neighbours, dist, seen, target, queue = grid.neighbours, self.dist, self.seen, self.target, self.queue
+        self.stamp += 1
+        stamp = self.stamp
+
+        # Cells a head could move into, and how many heads could: a cell two
+        # heads can reach risks a head-to-head crash
+        heads = {}
+        contested = Counter()
+        for i in self.alive():
+            head = self.index(self.snakes[i].cells[0])
+            heads[i] = head
+            contested.update(neighbours[head])
+        remaining = 0
+        for i in ids:
+            for nxt in neighbours[heads[i]]:
+                if target[nxt] != stamp and not occupied[nxt]:
+                    target[nxt] = stamp
+                    remaining += 1
+
+        tail = 0
+        for pos in self.foods:
+            cell = grid.cell(pos)
+            if not occupied[cell]:
+                seen[cell] = stamp
+                dist[cell] = 0
+                queue[tail] = cell
+                tail += 1
+        head = 0
+        while head < tail and remaining:
+            current = queue[head]
+            head += 1
+            if target[current] == stamp:
+                remaining -= 1
+            d = dist[current] + 1
+            for nxt in neighbours[current]:
+                if seen[nxt] != stamp and not occupied[nxt]:
+                    seen[nxt] = stamp
+                    dist[nxt] = d
+                    queue[tail] = nxt
+                    tail += 1
+
+        directions = {}
+        for i in ids:
+            snake, cell = self.snakes[i], heads[i]
+            best, best_key = None, None
+            moves = []
+            for nxt in neighbours[cell]:
+                if occupied[nxt]:
+                    continue
+                moves.append(nxt)
+                key = (contested[nxt] > 1, dist[nxt] if seen[nxt] == stamp else INF)
+                if best_key is None or key < best_key:
+                    best, best_key = nxt, key
+            if best is None:
+                directions[i] = snake.direction
+            elif best_key[1] == INF and not best_key[0]:
+                # No food reachable: any move that keeps clear of other heads
+                directions[i] = grid.direction(cell, self.ai_rng.choice(
+                    [nxt for nxt in moves if contested[nxt] <= 1]))
+            else:
+                directions[i] = grid.direction(cell, best)
+        return directions
+
+    def step(self, actions=None):
+        # actions maps player ids to a direction (None or missing keeps the
+        # current one). Every live snake moves once. Returns a list of
+        # (kind, snake_id, pos) events like Engine.step.
+        events = []
+        if self.over:
+            return events
+        self.ticks += 1
+        actions = actions or {}
+        grid, wall, occupied, free = self.grid, self.wall, self.occupied, self.free
+
+        alive = self.alive()
+        steering = self.plan([i for i in alive if i >= self.players])
+        for i in alive:
+            if i < self.players:
+                steering[i] = actions.get(i)
+
+        # Move everyone first: tails leave before heads are tested, as in
+        # Snake.move, and two heads on one cell both count there
+        for i in alive:
+            snake = self.snakes[i]
+            direction = steering[i]
+            if direction is not None and direction != OPPOSITE[snake.direction]:
+                snake.next_direction = direction
+            tail = snake.cells[-1]
+            grew = snake.grow
+            snake.move()
+            occupied[self.index(snake.cells[0])] += 1
+            free.take(snake.body[0])
+            if not grew:
+                occupied[self.index(tail)] -= 1
+                free.release(unpack_cell(tail))
+
+        heads = Counter(self.snakes[i].cells[0] for i in alive)
+        dead = []
+        for i in alive:
+            snake = self.snakes[i]
+            cell = self.index(snake.cells[0])
+            if wall[cell]:
+                snake.cause = "obstacle" if snake.body[0] in self.obstacles else "wall"
+            elif snake.counts[snake.cells[0]] > 1:
+                snake.cause = "self"
+            elif heads[snake.cells[0]] > 1:
+                snake.cause = "head"
+            elif occupied[cell] > 1:
+                snake.cause = "snake"
+            else:
+                continue
+            snake.alive = False
+            dead.append(i)
+
+        for i in dead:
+            snake = self.snakes[i]
+            events.append((DIE, i, snake.body[0]))
+            self.deaths[i] += 1
+            self.causes[snake.cause] += 1
+            for cell in snake.cells:
+                occupied[self.index(cell)] -= 1
+            for pos in snake.body:
+                free.release(pos)
+
+        for i in alive:
+            snake = self.snakes[i]
+            head = snake.body[0]
+            if snake.alive and head in self.foods:
+                snake.grow = True
+                self.scores[i] += 10
+                events.append((EAT, i, head))
+                self.foods.discard(head)
+                free.release(head)
+                self.place_food()
+
+        if not self.foods:
+            self.over = True
+            events.append((FULL, None, None))
+        elif self.players and all(self.snakes[i] is None or not self.snakes[i].alive for i in range(self.players)):
+            self.over = True
+        else:
+            for i in range(self.players, self.n_snakes):
+                if self.snakes[i] is None or not self.snakes[i].alive:
+                    self.spawn(i)
+        return events
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless arena of AI snakes")
+    parser.add_argument("--snakes", type=int, default=32)
+    parser.add_argument("--food", type=int, default=None, help="foods on the board (default: a quarter of the snakes)")
+    parser.add_argument("--cols", type=int, default=100, help="board width in cells")
+    parser.add_argument("--rows", type=int, default=70, help="board height in cells")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    arena = Arena(args.snakes, food_count=args.food, seed=args.seed, cols=args.cols, rows=args.rows)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        arena.step()
+        if arena.over:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"{arena.n_snakes} snakes on {arena.cols}x{arena.rows}, {arena.ticks} ticks in {elapsed:.2f} s "
+          f"({arena.ticks / elapsed:.0f} ticks/s)")
+    print(f"score  mean {sum(arena.scores) / arena.n_snakes:.1f}  max {max(arena.scores)}")
+    print(f"deaths {sum(arena.deaths)}: " + ", ".join(f"{cause} {count}" for cause, count in arena.causes.most_common()))
+
+if __name__ == "__main__":
+    main()
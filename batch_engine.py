@@ -0,0 +1,193 @@
+import random
+import numpy as np
+from settings import COLS, ROWS, SPAWN_MARGIN, MAX_OBSTACLES
+from level import generate_obstacles
+
+# Occupancy grid values. Snake i occupies cells with value SNAKE + i.
+EMPTY = 0
+OBSTACLE = 1
+FOOD = 2
+SNAKE = 3
+
+# Action / direction indices, in the same neighbour order ai.py searches
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTIONS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int64)
+OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int64)
+KEEP = -1
+
+class BatchEngine:
+    # Steps B independent boards at once with the same rules as engine.Engine.
+    # Snake 0 is the player (its death ends the board, which is reset in place),
+    # snake 1 is the AI (its death gives the player 50 points and it respawns).
+    #
+    # Observation buffers are plain attributes and are updated in place:
+    #   grid        uint8 (B, rows, cols) occupancy, see EMPTY/OBSTACLE/FOOD/SNAKE
+    #   heads       (B, S, 2) head cells as (x, y)
+    #   directions  (B, S) direction index into DIRECTIONS
+    #   food        (B, 2) food cell as (x, y)
+    #   scores      (B, S)
+    # Bodies are ring buffers of flat cell indices (y * cols + x): the head of
+    # snake s on board b is bodies[b, s, head_ptr[b, s]] and the tail sits
+    # lengths[b, s] - 1 slots behind it.
+    def __init__(self, batch_size, with_ai=True, obstacle_count=MAX_OBSTACLES, seed=None, cols=COLS, rows=ROWS):
+        self.batch_size = batch_size
+        self.n_snakes = 2 if with_ai else 1
+        self.obstacle_count = obstacle_count
+        self.cols = cols
+        self.rows = rows
+        self.capacity = self.cols * self.rows
+
+        B, S = batch_size, self.n_snakes
+        self.grid = np.zeros((B, self.rows, self.cols), dtype=np.uint8)
+        self.flat = self.grid.reshape(B, self.capacity)  # view of grid, not a copy
+        self.bodies = np.zeros((B, S, self.capacity), dtype=np.int32)
+        self.head_ptr = np.zeros((B, S), dtype=np.int64)
+        self.lengths = np.zeros((B, S), dtype=np.int64)
+        self.heads = np.zeros((B, S, 2), dtype=np.int64)
+        self.directions = np.zeros((B, S), dtype=np.int64)
+        self.grow = np.zeros((B, S), dtype=bool)
+        self.food = np.zeros((B, 2), dtype=np.int64)
+        self.scores = np.zeros((B, S), dtype=np.int64)
+        self.ticks = np.zeros(B, dtype=np.int64)
+        # Results of the last finished round on each board (boards reset on done)
+        self.final_scores = np.zeros((B, S), dtype=np.int64)
+        self.final_ticks = np.zeros(B, dtype=np.int64)
+        self.boards = np.arange(B)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.level_rng = random.Random(seed)
+        self.reset_boards(self.boards)
+        return self.grid
+
+    def reset_boards(self, boards):
+        if len(boards) == 0:
+            return
+        self.grid[boards] = EMPTY
+        for b in boards:
+            for x, y in generate_obstacles(self.obstacle_count, self.level_rng, self.cols, self.rows):
+                self.grid[b, y, x] = OBSTACLE
+        for s in range(self.n_snakes):
+            self.place_snake(boards, s)
+        self.scores[boards] = 0
+        self.ticks[boards] = 0
+        self.spawn_food(boards)
+
+    def place_snake(self, boards, s):
+        # Same spawn points as the engine: 3 cells long, heading right
+        x = SPAWN_MARGIN if s == 0 else self.cols - SPAWN_MARGIN
+        y = self.rows // 2
+        cells = y * self.cols + x - np.arange(2, -1, -1)  # tail ... head
+
+        self.bodies[boards, s, :3] = cells
+        self.head_ptr[boards, s] = 2
+        self.lengths[boards, s] = 3
+        self.heads[boards, s] = (x, y)
+        self.directions[boards, s] = RIGHT
+        self.grow[boards, s] = False
+
+        # Never overwrite another snake or an obstacle; report swallowed food
+        rows = boards[:, None]
+        current = self.flat[rows, cells]
+        free = (current == EMPTY) | (current == FOOD)
+        self.flat[rows, cells] = np.where(free, SNAKE + s, current)
+        return boards[(current == FOOD).any(axis=1)]
+
+    def spawn_food(self, boards):
+        # Uniform pick among empty cells: random keys with occupied cells masked
+        # out, argmax per board. Returns the boards that have no empty cell left.
+        if len(boards) == 0:
+            return boards
+        keys = self.rng.random((len(boards), self.capacity))
+        keys[self.flat[boards] != EMPTY] = -1.0
+        cells = keys.argmax(axis=1)
+        full = keys[np.arange(len(boards)), cells] < 0
+
+        placed, cells = boards[~full], cells[~full]
+        self.flat[placed, cells] = FOOD
+        self.food[placed, 0] = cells % self.cols
+        self.food[placed, 1] = cells // self.cols
+        return boards[full]
+
+    def step(self, actions):
+        # actions: int array (B, S) of direction indices, KEEP for no turn.
+        # Returns (rewards, dones); finished boards are already reset and their
+        # results are in final_scores / final_ticks.
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.batch_size, self.n_snakes)
+        boards = self.boards
+        rewards = np.zeros((self.batch_size, self.n_snakes), dtype=np.int64)
+        dones = np.zeros(self.batch_size, dtype=bool)
+        self.ticks += 1
+
+        for s in range(self.n_snakes):
+            # A dead player stops the board for the rest of this tick
+            moving = ~dones
+
+            act = actions[:, s]
+            turn = moving & (act >= 0) & (act != OPPOSITE[self.directions[:, s]])
+            self.directions[turn, s] = act[turn]
+
+            # Pop the tail before the collision test, like Snake.move does
+            ptr = self.head_ptr[:, s]
+            pop = moving & ~self.grow[:, s]
+            tail = self.bodies[boards, s, (ptr - self.lengths[:, s] + 1) % self.capacity]
+            b, t = boards[pop], tail[pop]
+            mine = self.flat[b, t] == SNAKE + s
+            self.flat[b[mine], t[mine]] = EMPTY
+            self.lengths[moving & self.grow[:, s], s] += 1
+            self.grow[moving, s] = False
+
+            new = self.heads[:, s] + DIRECTIONS[self.directions[:, s]]
+            inside = ((new[:, 0] >= 0) & (new[:, 0] < self.cols) &
+                      (new[:, 1] >= 0) & (new[:, 1] < self.rows))
+            cell = np.where(inside, new[:, 1] * self.cols + new[:, 0], 0)
+            target = np.where(inside, self.flat[boards, cell], OBSTACLE)
+            dead = moving & (target != EMPTY) & (target != FOOD)
+            ok = moving & ~dead
+
+            b = boards[ok]
+            ptr = (self.head_ptr[b, s] + 1) % self.capacity
+            self.head_ptr[b, s] = ptr
+            self.bodies[b, s, ptr] = cell[ok]
+            self.heads[b, s] = new[ok]
+            self.flat[b, cell[ok]] = SNAKE + s
+
+            ate = ok & (target == FOOD)
+            self.grow[ate, s] = True
+            self.scores[ate, s] += 10
+            rewards[ate, s] += 10
+            dones[self.spawn_food(boards[ate])] = True
+
+            if s == 0:
+                dones |= dead
+            else:
+                # AI death: player bonus, clear the body and respawn
+                b = boards[dead]
+                self.scores[b, 0] += 50
+                rewards[b, 0] += 50
+                cleared = self.flat[b]
+                cleared[cleared == SNAKE + s] = EMPTY
+                self.flat[b] = cleared
+                dones[self.spawn_food(self.place_snake(b, s))] = True
+
+        done = boards[dones]
+        self.final_scores[done] = self.scores[done]
+        self.final_ticks[done] = self.ticks[done]
+        self.reset_boards(done)
+        return rewards, dones
+
+    def ai_actions(self, s=1):
+        # Batched stand-in for ai.ai_move: step to the safe neighbour closest to
+        # the food (Manhattan distance), KEEP when every neighbour is blocked.
+        candidates = self.heads[:, s, None, :] + DIRECTIONS[None]
+        inside = ((candidates[..., 0] >= 0) & (candidates[..., 0] < self.cols) &
+                  (candidates[..., 1] >= 0) & (candidates[..., 1] < self.rows))
+        cells = np.where(inside, candidates[..., 1] * self.cols + candidates[..., 0], 0)
+        occupant = self.flat[self.boards[:, None], cells]
+        safe = inside & ((occupant == EMPTY) | (occupant == FOOD))
+
+        distance = np.abs(candidates - self.food[:, None, :]).sum(axis=2)
+        distance[~safe] = self.capacity
+        choice = distance.argmin(axis=1)
+        return np.where(safe.any(axis=1), choice, KEEP)
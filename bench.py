@@ -0,0 +1,300 @@
+# Headless benchmarks (SDL dummy video driver, fixed seeds).
+#   python bench.py                          all board / cell size configurations
+#   python bench.py --quick                  default board only
+#   python bench.py --save-baseline          refresh bench_baseline.json
+#   python bench.py --compare bench_baseline.json [--tolerance 0.25]
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# Configurations as (COLS, ROWS, CELL_SIZE), the window staying WIDTH x
+# HEIGHT: the cell size decides how much of the board a frame draws and how
+# big every sprite is. Modules take the settings defaults at import, so each
+# configuration runs in its own process.
+CONFIGS = [
+    (20, 14, 25),
+    (40, 28, 25),
+    (40, 28, 10),
+    (40, 28, 50),
+    (80, 56, 25),
+    (100, 70, 10),
+    (100, 70, 25),
+    (1000, 1000, 25),
+]
+QUICK_CONFIGS = [(40, 28, 25)]
+
+# Whole-board BFS cases take seconds a call above this many cells
+FULL_SEARCH_MAX_CELLS = 256 * 256
+
+SEED = 1234
+BASELINE = "bench_baseline.json"
+RESULTS = "bench_results.json"
+
+def timeit(func, repeat=7, min_time=0.05):
+    # Microseconds per call: calls are batched until a batch takes at least
+    # min_time, then the best of `repeat` batches is kept
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+def hamiltonian_cycle(cols, rows):
+    # Cells of a closed tour: boustrophedon over columns 1.. and back up
+    # column 0. Uses an even number of rows so the tour closes.
+    rows -= rows % 2
+    tour = []
+    for y in range(rows):
+        xs = range(1, cols) if y % 2 == 0 else range(cols - 1, 0, -1)
+        tour.extend((x, y) for x in xs)
+    tour.extend((0, y) for y in range(rows - 1, -1, -1))
+    return tour
+
+def snake_along(tour, length):
+    # Snake whose body covers the first `length` tour cells, head on the last
+    from snake import Snake, pack_cell
+    x, y = tour[0]
+    snake = Snake(x, y, (0, 0, 0), (0, 0, 0))
+    snake.cells.clear()
+    snake.counts.clear()
+    for pos in tour[:length]:
+        cell = pack_cell(pos)
+        snake.cells.appendleft(cell)
+        snake.counts[cell] = 1
+    return snake
+
+# ========== CHECKS (run inside a worker process, before the cases) ==========
+# Results the optimisations must not change; a failure fails the run
+def check_walls():
+    # Walls stamped once per round by GridSearch.set_walls must survive a
+    # plan for a snake lying over one of them
+    from settings import COLS, ROWS
+    from snake import Snake
+    from ai import anytime_direction, get_search
+    x, y = COLS // 2, ROWS // 2
+    snake = Snake(x, y, (0, 0, 0), (0, 0, 0))
+    obstacles = {(x - 1, y)}
+    anytime_direction(snake.cells, (0, 0), obstacles, cols=COLS, rows=ROWS)
+    grid = get_search(COLS, ROWS)
+    grid.begin()
+    grid.set_walls(obstacles)
+    if grid.is_free(grid.cell((x - 1, y))):
+        raise AssertionError("planning over an obstacle unblocked it for the rest of the round")
+
+CHECKS = [check_walls]
+
+# ========== CASES (run inside a worker process) ==========
+def bench_ai(results):
+    from settings import COLS, ROWS
+    from ai import ai_move, ai_move_anytime
+    cols, rows = COLS, ROWS
+    tour = hamiltonian_cycle(cols, rows)
+    rng = random.Random(SEED)
+
+    far = (cols - 1, rows - 1)
+    snake = snake_along(tour, 3)
+    long_snake = snake_along(tour, cols * rows // 2)
+    # Food walled in by a ring of obstacles: the search exhausts the board
+    fx, fy = cols // 2, rows // 2
+    ring = [(fx + dx, fy + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+    food = (fx, fy)
+
+    if cols * rows <= FULL_SEARCH_MAX_CELLS:
+        results["ai_move/empty"] = timeit(lambda: ai_move(snake, far, [], None, rng))
+
+        free = [(x, y) for x in range(cols) for y in range(rows)
+                if (x, y) not in tour[:3] and (x, y) != far]
+        dense = rng.sample(free, len(free) // 4)
+        results["ai_move/dense_obstacles"] = timeit(lambda: ai_move(snake, far, dense, None, rng))
+
+        results["ai_move/long_snake"] = timeit(lambda: ai_move(long_snake, far, [], None, rng))
+        results["ai_move/unreachable_food"] = timeit(lambda: ai_move(snake, food, ring, None, rng))
+
+    # Deadline-bounded planner: the cost should flatten out at its budget
+    results["ai_move_anytime/empty"] = timeit(lambda: ai_move_anytime(snake, far, [], None, rng=rng))
+    results["ai_move_anytime/long_snake"] = timeit(lambda: ai_move_anytime(long_snake, far, [], None, rng=rng))
+    results["ai_move_anytime/unreachable_food"] = timeit(lambda: ai_move_anytime(snake, food, ring, None, rng=rng))
+
+def bench_snake(results):
+    from settings import COLS, ROWS
+    cols, rows = COLS, ROWS
+    tour = hamiltonian_cycle(cols, rows)
+    # Direction to take from each tour cell to the next one
+    step = {}
+    for i, (x, y) in enumerate(tour):
+        nx, ny = tour[(i + 1) % len(tour)]
+        step[(x, y)] = (nx - x, ny - y)
+
+    for length in (10, 100, 1000, 10000):
+        if length >= len(tour):
+            continue
+        # Laid along the tour so the snake can follow it forever
+        snake = snake_along(tour, length)
+        snake.direction = snake.next_direction = step[snake.body[1]]
+
+        def tick():
+            snake.next_direction = step[snake.body[0]]
+            snake.move()
+            snake.check_collision(cols, rows, [])
+        results[f"snake/move_collision/len={length}"] = timeit(tick)
+
+def bench_spawn(results):
+    from engine import Engine
+    for fill in (0.0, 0.5, 0.9, 0.99):
+        engine = Engine(with_ai=False, obstacle_count=0, seed=SEED)
+        free = engine.free
+        left = max(1, int(free.cols * free.rows * (1 - fill)))
+        cells = list(free.cells)
+        engine.rng.shuffle(cells)
+        # Cover random cells until only `left` free ones remain
+        while len(free.cells) > left:
+            cell = cells.pop()
+            free.take((cell % free.cols, cell // free.cols))
+        results[f"spawn_food/fill={fill}"] = timeit(engine.spawn_food)
+
+def bench_engine(results):
+    from engine import Engine, PLAYER, AI
+    engine = Engine(seed=SEED)
+    directions = [None, None, None, (0, 1), (1, 0), (0, -1), (-1, 0)]
+    rng = random.Random(SEED)
+
+    def tick():
+        engine.step({PLAYER: rng.choice(directions), AI: None})
+        if engine.over:
+            engine.reset(SEED)
+    results["engine/step_with_ai"] = timeit(tick)
+
+def bench_arena(results):
+    # One tick of a crowded arena: a step plans every AI snake in one pass
+    from settings import COLS, ROWS
+    from arena import Arena
+    if COLS * ROWS > FULL_SEARCH_MAX_CELLS:
+        return
+    for snakes in (8, 32):
+        arena = Arena(snakes, seed=SEED)
+
+        def tick():
+            arena.step()
+            if arena.over:
+                arena.reset(SEED)
+        results[f"arena/step/snakes={snakes}"] = timeit(tick)
+
+def bench_draw(results):
+    import pygame
+    import main
+    from settings import AI_COLOR
+    game = main.Game()
+    game.start_game(main.PLAYING_AI)
+    game.add_particles(game.engine.ai_snake.body[0], AI_COLOR)
+    frame = [0]
+
+    def draw_full():
+        game.dirty_rects = None
+        frame[0] += 16
+        game.draw(frame[0])
+
+    def draw():
+        frame[0] += 16
+        game.draw(frame[0])
+    results["draw/full_frame"] = timeit(draw_full)
+    game.draw(frame[0])
+    results["draw/frame"] = timeit(draw)
+    pygame.quit()
+
+CASES = [bench_ai, bench_snake, bench_spawn, bench_engine, bench_arena, bench_draw]
+
+def worker(cols, rows, cell_size):
+    # Patch the board constants before any game module imports them
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import settings
+    settings.COLS, settings.ROWS, settings.CELL_SIZE = cols, rows, cell_size
+    for check in CHECKS:
+        check()
+    results = {}
+    for case in CASES:
+        case(results)
+    print(json.dumps(results))
+
+# ========== DRIVER ==========
+def run(configs):
+    records = []
+    here = os.path.dirname(os.path.abspath(__file__))
+    for cols, rows, cell_size in configs:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(cols), str(rows), str(cell_size)],
+            cwd=here, capture_output=True, text=True, check=True
+        ).stdout
+        # Results are the last line, anything above is library chatter
+        for case, us in json.loads(out.splitlines()[-1]).items():
+            records.append({"case": case, "cols": cols, "rows": rows, "cell_size": cell_size, "us": round(us, 3)})
+            print(f"{cols:>4}x{rows:<4} @{cell_size:<3} {case:<36} {us:12.2f} us")
+    return records
+
+def key(record):
+    return (record["case"], record["cols"], record["rows"], record["cell_size"])
+
+def compare(records, baseline, tolerance):
+    # Returns the records that got slower than baseline by more than tolerance
+    base = {key(r): r["us"] for r in baseline["results"]}
+    regressions = []
+    for record in records:
+        old = base.get(key(record))
+        if old is None:
+            continue
+        ratio = record["us"] / old if old else 1.0
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{record['cols']:>4}x{record['rows']:<4} @{record['cell_size']:<3} {record['case']:<36} "
+              f"{old:10.2f} -> {record['us']:10.2f} us  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(record)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for AI, movement, spawning and rendering")
+    parser.add_argument("--quick", action="store_true", help="only the default board")
+    parser.add_argument("--output", default=RESULTS, help="where to write results JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write results to {BASELINE}")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--worker", nargs=3, type=int, metavar=("COLS", "ROWS", "CELL_SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    records = run(QUICK_CONFIGS if args.quick else CONFIGS)
+    data = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "seed": SEED},
+        "results": records,
+    }
+    for path in [args.output] + ([BASELINE] if args.save_baseline else []):
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(records, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from settings import WIDTH, HEIGHT, CELL_SIZE
+
+# Share of the view, on each side, the followed snake can move into before
+# the camera scrolls
+DEAD_ZONE = 0.25
+
+class Camera:
+    # Pixel offset of the WIDTH x HEIGHT view into a board of cols x rows
+    # cells: board pixel (px, py) shows on screen at (px - x, py - y). The
+    # camera scrolls in whole cells, only as far as it takes to keep the
+    # followed cell out of the margins, and never past the board edges. An
+    # axis on which the board is smaller than the view stays centred.
+    def __init__(self, cols, rows, width=WIDTH, height=HEIGHT):
+        self.board_width = cols * CELL_SIZE
+        self.board_height = rows * CELL_SIZE
+        self.width = width
+        self.height = height
+        self.margin_x = int(width // CELL_SIZE * DEAD_ZONE) * CELL_SIZE
+        self.margin_y = int(height // CELL_SIZE * DEAD_ZONE) * CELL_SIZE
+        self.x = self.clamp(0, self.board_width, width)
+        self.y = self.clamp(0, self.board_height, height)
+
+    def clamp(self, offset, board, view):
+        if board <= view:
+            return (board - view) // 2
+        return max(0, min(offset, board - view))
+
+    def center(self, pos):
+        x = pos[0] * CELL_SIZE + (CELL_SIZE - self.width) // 2
+        y = pos[1] * CELL_SIZE + (CELL_SIZE - self.height) // 2
+        self.x = self.clamp(x - x % CELL_SIZE, self.board_width, self.width)
+        self.y = self.clamp(y - y % CELL_SIZE, self.board_height, self.height)
+
+    def follow(self, pos):
+        # Scroll to keep the cell at pos outside the margins; True if it moved
+        px, py = pos[0] * CELL_SIZE, pos[1] * CELL_SIZE
+        x, y = self.x, self.y
+        if px - x < self.margin_x:
+            x = px - self.margin_x
+        elif px + CELL_SIZE - x > self.width - self.margin_x:
+            x = px + CELL_SIZE - self.width + self.margin_x
+        if py - y < self.margin_y:
+            y = py - self.margin_y
+        elif py + CELL_SIZE - y > self.height - self.margin_y:
+            y = py + CELL_SIZE - self.height + self.margin_y
+        x = self.clamp(x, self.board_width, self.width)
+        y = self.clamp(y, self.board_height, self.height)
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+        return moved
+
+    def visible_cells(self):
+        # (left, top, right, bottom) cell bounds of the view, right / bottom
+        # exclusive, with one cell to spare for snakes sliding in
+        left = self.x // CELL_SIZE - 1
+        top = self.y // CELL_SIZE - 1
+        right = -(-(self.x + self.width) // CELL_SIZE) + 1
+        bottom = -(-(self.y + self.height) // CELL_SIZE) + 1
+        return left, top, right, bottom
+
+    def to_screen(self, pos):
+        # Top-left screen pixel of a board cell
+        return pos[0] * CELL_SIZE - self.x, pos[1] * CELL_SIZE - self.y
@@ -0,0 +1,244 @@
+import random
+from array import array
+from settings import (COLS, ROWS, MIN_COLS, MIN_ROWS, MAX_BOARD, SPAWN_MARGIN, MAX_OBSTACLES, INITIAL_SPEED,
+                      MAX_SPEED, SPEED_INCREMENT, PLAYER_COLOR, PLAYER_TAIL, AI_COLOR, AI_TAIL)
+from snake import Snake
+from ai import DistanceField, ai_move_field, ai_move_anytime, PLAN_BUDGET_CELLS
+from level import generate_obstacles
+from profiler import NullProfiler
+
+# Snake ids used as keys in step() actions and in events
+PLAYER = "player"
+AI = "ai"
+
+# Event kinds reported by step()
+EAT = "eat"
+DIE = "die"
+FULL = "full"  # no free cell left for food, the round ends
+
+OPPOSITE = {(0, -1): (0, 1), (0, 1): (0, -1), (-1, 0): (1, 0), (1, 0): (-1, 0)}
+
+# Above this many cells the AI plans with the deadline-bounded planner instead
+# of the distance field, whose rebuild after every meal is O(board)
+FIELD_MAX_CELLS = 128 * 128
+
+class FreeCells:
+    # Cells not covered by an obstacle or a snake segment. The free cells sit
+    # in a dense list (slot maps a cell to its index, -1 when taken) and are
+    # removed by swapping the last entry into the hole, so add, remove and a
+    # uniform random pick are all O(1). taken counts what covers each cell.
+    def __init__(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+
+    def reset(self, obstacles, bodies):
+        size = self.cols * self.rows
+        self.cells = array("i", range(size))
+        self.slot = array("i", range(size))
+        self.taken = bytearray(size)
+        for pos in obstacles:
+            self.take(pos)
+        for body in bodies:
+            for pos in body:
+                self.take(pos)
+
+    def cell(self, pos):
+        x, y = pos
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return y * self.cols + x
+        return None
+
+    def take(self, pos):
+        cell = self.cell(pos)
+        if cell is None:
+            return
+        self.taken[cell] += 1
+        if self.taken[cell] == 1:
+            index, last = self.slot[cell], self.cells.pop()
+            if last != cell:
+                self.cells[index] = last
+                self.slot[last] = index
+            self.slot[cell] = -1
+
+    def release(self, pos):
+        cell = self.cell(pos)
+        if cell is None:
+            return
+        self.taken[cell] -= 1
+        if self.taken[cell] == 0:
+            self.slot[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def choice(self, rng):
+        # Uniformly random free cell as (x, y), None if the board is full
+        if not self.cells:
+            return None
+        cell = self.cells[rng.randrange(len(self.cells))]
+        return (cell % self.cols, cell // self.cols)
+
+class Engine:
+    # Pure game rules, no rendering and no clock. Callers decide when a tick
+    # happens; one step() advances every snake named in the actions by one cell.
+    # Positions are (x, y) grid cells on a cols x rows board. level, when
+    # given, is the obstacle cells of every round (a level.generate_level()
+    # or level pack entry) in place of a few random ones; level_recipe is the
+    # (seed, pattern, density) generate_level() built it from, if known, so
+    # replays can store that instead of the level.
+    def __init__(self, with_ai=True, obstacle_count=MAX_OBSTACLES, seed=None, cols=COLS, rows=ROWS,
+                 level=None, level_recipe=None):
+        if not (MIN_COLS <= cols <= MAX_BOARD and MIN_ROWS <= rows <= MAX_BOARD):
+            raise ValueError(f"board must be {MIN_COLS}x{MIN_ROWS} to {MAX_BOARD}x{MAX_BOARD} cells, got {cols}x{rows}")
+        self.cols = cols
+        self.rows = rows
+        self.with_ai = with_ai
+        self.obstacle_count = obstacle_count
+        self.level = level
+        self.level_recipe = level_recipe
+        # Swapped for a profiler.FrameProfiler to time the parts of step()
+        self.profiler = NullProfiler()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # AI tie-breaks draw from their own stream, so the level and food depend
+        # only on the seed and the moves made (replays feed recorded AI moves)
+        self.ai_rng = random.Random(self.rng.getrandbits(64))
+        self.player = Snake(SPAWN_MARGIN, self.rows//2, PLAYER_COLOR, PLAYER_TAIL)
+        if self.level is not None:
+            self.obstacles = set(self.level)
+        else:
+            self.obstacles = set(generate_obstacles(self.obstacle_count, self.rng, self.cols, self.rows))
+
+        if self.with_ai:
+            self.ai_snake = self.spawn_ai()
+            self.ai_snake.next_direction = (-1, 0)
+        else:
+            self.ai_snake = None
+
+        self.free = FreeCells(self.cols, self.rows)
+        self.free.reset(self.obstacles, self.bodies())
+        self.food = self.spawn_food()
+        self.field = DistanceField(self.cols, self.rows)
+        self.field.reset(self.obstacles, self.bodies(), self.food)
+        self.score = 0
+        self.ai_score = 0
+        self.game_speed = INITIAL_SPEED
+        self.ticks = 0
+        self.over = False
+        return self
+
+    def spawn_ai(self):
+        return Snake(self.cols - SPAWN_MARGIN, self.rows//2, AI_COLOR, AI_TAIL, is_ai=True)
+
+    def bodies(self):
+        if self.ai_snake:
+            return [self.player.body, self.ai_snake.body]
+        return [self.player.body]
+
+    def spawn_food(self):
+        # Don't spawn on obstacles or snakes; None when no cell is left
+        return self.free.choice(self.rng)
+
+    def place_food(self):
+        # Replace eaten food, returns False when the board is full
+        self.food = self.spawn_food()
+        if self.food is None:
+            self.over = True
+            return False
+        self.field.set_food(self.food)
+        return True
+
+    def plan_ai(self):
+        if self.cols * self.rows <= FIELD_MAX_CELLS:
+            ai_move_field(self.ai_snake, self.field, self.ai_rng)
+        else:
+            # Budgeted in cells, not time, so a seeded game plays out the same
+            # on every run and machine
+            ai_move_anytime(self.ai_snake, self.food, self.obstacles, self.player.body,
+                            rng=self.ai_rng, cols=self.cols, rows=self.rows, budget_cells=PLAN_BUDGET_CELLS)
+
+    def steer(self, snake, direction):
+        # None keeps the queued direction; reversing into the neck is ignored
+        if direction is not None and direction != OPPOSITE[snake.direction]:
+            snake.next_direction = direction
+
+    def move(self, snake):
+        # Move a snake and keep the free cells and AI distance field in sync
+        tail = snake.body[-1]
+        grew = snake.grow
+        snake.move()
+        head = snake.body[0]
+        self.free.take(head)
+        self.field.occupy(head)
+        if not grew:
+            self.free.release(tail)
+            self.field.vacate(tail)
+
+    def add(self, snake):
+        # Cover a new snake's cells; cheaper than a reset on big boards
+        for pos in snake.body:
+            self.free.take(pos)
+            self.field.occupy(pos)
+
+    def remove(self, snake):
+        # Uncover every cell a dead snake holds, its head included
+        for pos in snake.body:
+            self.free.release(pos)
+            self.field.vacate(pos)
+
+    def step(self, actions):
+        # actions maps PLAYER / AI to a direction, or to None to keep the current
+        # one (the AI snake plans its own move when given None). Snakes missing
+        # from actions stay put this tick. Returns a list of (kind, snake_id, pos).
+        events = []
+        if self.over:
+            return events
+        self.ticks += 1
+
+        profiler = self.profiler
+        if PLAYER in actions:
+            with profiler.section("update/player_move"):
+                self.steer(self.player, actions[PLAYER])
+                self.move(self.player)
+
+            with profiler.section("update/collision"):
+                if self.player.check_collision(self.cols, self.rows, self.obstacles, self.ai_snake):
+                    self.over = True
+                    events.append((DIE, PLAYER, self.player.body[0]))
+                    return events
+
+                if self.player.body[0] == self.food:
+                    self.player.grow = True
+                    events.append((EAT, PLAYER, self.food))
+                    self.score += 10
+                    self.game_speed = min(MAX_SPEED, self.game_speed + SPEED_INCREMENT)
+                    if not self.place_food():
+                        events.append((FULL, PLAYER, self.player.body[0]))
+                        return events
+
+        if self.ai_snake and AI in actions:
+            with profiler.section("update/ai_move"):
+                if actions[AI] is None:
+                    self.plan_ai()
+                else:
+                    self.steer(self.ai_snake, actions[AI])
+                self.move(self.ai_snake)
+
+            with profiler.section("update/collision"):
+                if self.ai_snake.check_collision(self.cols, self.rows, self.obstacles, self.player):
+                    # AI death is not game over: the player gets a bonus and the AI respawns
+                    events.append((DIE, AI, self.ai_snake.body[0]))
+                    self.remove(self.ai_snake)
+                    self.ai_snake = self.spawn_ai()
+                    self.add(self.ai_snake)
+                    self.score += 50
+
+                if self.ai_snake.body[0] == self.food:
+                    self.ai_snake.grow = True
+                    events.append((EAT, AI, self.food))
+                    self.ai_score += 10
+                    if not self.place_food():
+                        events.append((FULL, AI, self.ai_snake.body[0]))
+
+        return events
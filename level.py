@@ -1,21 +1,387 @@
-import random
-from settings import WIDTH, HEIGHT, CELL_SIZE, MAX_OBSTACLES
-
-def generate_obstacles(count=None):
-    if count is None:
-        count = MAX_OBSTACLES
-        
-    obstacles = set()
-    attempts = 0
-    while len(obstacles) < count and attempts < 100:
-        x = random.randrange(CELL_SIZE, WIDTH - CELL_SIZE, CELL_SIZE)
-        y = random.randrange(CELL_SIZE, HEIGHT - CELL_SIZE, CELL_SIZE)
-        
-        # Avoid middle area for spawn safety
-        if abs(x - WIDTH//2) < 4 * CELL_SIZE and abs(y - HEIGHT//2) < 4 * CELL_SIZE:
-            attempts += 1
-            continue
-            
-        obstacles.add((x, y))
-        attempts += 1
-    return list(obstacles)
\ No newline at end of file
+# Level generation and level packs.
+#   python level.py generate PACK --count 5000 --pattern maze --density 0.2
+#   python level.py validate PACK...
+#   python level.py info PACK...
+# generate_level() is seeded and guarantees that the free cells form one
+# connected region (union-find) and that both spawn points are clear. Packs
+# hold one fixed-size record per level, so a memory-mapped pack hands any
+# level over without reading the rest of the file.
+import argparse
+import mmap
+import random
+import struct
+import sys
+import time
+from collections import deque
+from settings import COLS, ROWS, MIN_COLS, MIN_ROWS, MAX_BOARD, SPAWN_MARGIN, MAX_OBSTACLES
+
+def generate_obstacles(count=None, rng=random, cols=COLS, rows=ROWS):
+    # Obstacle cells as (x, y), never on the border or near the middle
+    if count is None:
+        count = MAX_OBSTACLES
+        
+    obstacles = set()
+    attempts = 0
+    while len(obstacles) < count and attempts < 100:
+        x = rng.randrange(1, cols - 1)
+        y = rng.randrange(1, rows - 1)
+        
+        # Avoid middle area for spawn safety
+        if abs(x - cols//2) < 4 and abs(y - rows//2) < 4:
+            attempts += 1
+            continue
+            
+        obstacles.add((x, y))
+        attempts += 1
+    return list(obstacles)
+
+# ========== GENERATOR ==========
+DENSITY = "density"  # independent random cells
+WALLS = "walls"      # random straight wall segments
+MAZE = "maze"        # a maze of rooms, thinned out with extra openings
+PATTERNS = [DENSITY, WALLS, MAZE]
+
+MAZE_ROOM = 3  # maze corridors are this many cells wide
+MAX_WALL = 12  # longest segment of the walls pattern
+
+def board_error(cols, rows):
+    # Why the engine can't play a board this size, None if it can
+    if not (MIN_COLS <= cols <= MAX_BOARD and MIN_ROWS <= rows <= MAX_BOARD):
+        return f"board must be {MIN_COLS}x{MIN_ROWS} to {MAX_BOARD}x{MAX_BOARD} cells, got {cols}x{rows}"
+    return None
+
+def spawn_area(cols, rows):
+    # Cells kept free around both spawn points of Engine: the 3-cell bodies
+    # with a cell of room all round and 3 cells of run-up on either side
+    y = rows // 2
+    for x0 in (SPAWN_MARGIN, cols - SPAWN_MARGIN):
+        for x in range(x0 - 3, x0 + 4):
+            for dy in (-1, 0, 1):
+                yield (x, y + dy)
+
+def find(parent, i):
+    # Root of i's set, halving the path on the way up
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def regions(blocked, cols):
+    # Union-find over the free cells of blocked (bytearray over y * cols + x):
+    # returns (parent, roots) with one root per connected free region
+    size = len(blocked)
+    parent = list(range(size))
+    for i in range(size):
+        if blocked[i]:
+            continue
+        if (i + 1) % cols and not blocked[i + 1]:
+            parent[find(parent, i + 1)] = find(parent, i)
+        if i + cols < size and not blocked[i + cols]:
+            parent[find(parent, i + cols)] = find(parent, i)
+    roots = {find(parent, i) for i in range(size) if not blocked[i]}
+    return parent, roots
+
+def around(i, cols, size):
+    x = i % cols
+    return [j for j in (i - cols, i + cols, i - 1 if x else -1, i + 1 if x < cols - 1 else -1) if 0 <= j < size]
+
+def open_cell(blocked, parent, cols, i):
+    # Unblock i and merge it with every free region next to it; returns how
+    # many regions were merged away
+    near = {find(parent, j) for j in around(i, cols, len(blocked)) if not blocked[j]}
+    blocked[i] = 0
+    parent[i] = i
+    for root in near:
+        parent[root] = i
+    return len(near) - 1
+
+def carve(blocked, parent, cols, start, goal):
+    # Open the shortest run of cells from start to goal's region
+    goal = find(parent, goal)
+    back = {start: None}
+    queue = deque([start])
+    while queue:
+        i = queue.popleft()
+        if not blocked[i] and find(parent, i) == goal:
+            break
+        for j in around(i, cols, len(blocked)):
+            if j not in back:
+                back[j] = i
+                queue.append(j)
+    while i is not None:
+        if blocked[i]:
+            open_cell(blocked, parent, cols, i)
+        i = back[i]
+
+def connect(blocked, cols, rng, keep):
+    # Make the free cells one region that holds every cell in keep: open, in
+    # random order, blocked cells that join two or more regions, then carve
+    # a way between regions of keep still apart (walls more than a cell
+    # thick) and fill whatever is left cut off
+    size = len(blocked)
+    parent, roots = regions(blocked, cols)
+    count = len(roots)
+    if count > 1:
+        candidates = [i for i in range(size) if blocked[i]]
+        rng.shuffle(candidates)
+        for i in candidates:
+            if count == 1:
+                break
+            if len({find(parent, j) for j in around(i, cols, size) if not blocked[j]}) > 1:
+                count -= open_cell(blocked, parent, cols, i)
+    for i in keep[1:]:
+        if find(parent, i) != find(parent, keep[0]):
+            carve(blocked, parent, cols, i, keep[0])
+    main = find(parent, keep[0])
+    for i in range(size):
+        if not blocked[i] and find(parent, i) != main:
+            blocked[i] = 1
+
+def scatter(blocked, cols, rows, density, rng):
+    for i in range(cols * rows):
+        if rng.random() < density:
+            blocked[i] = 1
+
+def walls(blocked, cols, rows, density, rng):
+    target = int(cols * rows * density)
+    placed = 0
+    for _ in range(cols * rows):
+        if placed >= target:
+            break
+        x, y = rng.randrange(cols), rng.randrange(rows)
+        dx, dy = rng.choice([(1, 0), (0, 1)])
+        for _ in range(rng.randint(3, MAX_WALL)):
+            if x >= cols or y >= rows:
+                break
+            if not blocked[y * cols + x]:
+                blocked[y * cols + x] = 1
+                placed += 1
+            x, y = x + dx, y + dy
+
+def maze(blocked, cols, rows, density, rng):
+    # Wall lines every MAZE_ROOM + 1 cells split the board into rooms. A
+    # random spanning tree over the rooms (Kruskal, union-find) opens the
+    # wall between joined rooms, then more walls open at random until the
+    # obstacles are down to density.
+    lines_x = list(range(MAZE_ROOM, cols - 1, MAZE_ROOM + 1))
+    lines_y = list(range(MAZE_ROOM, rows - 1, MAZE_ROOM + 1))
+    for x in lines_x:
+        for y in range(rows):
+            blocked[y * cols + x] = 1
+    for y in lines_y:
+        for x in range(cols):
+            blocked[y * cols + x] = 1
+
+    def spans(lines, length):
+        starts = [0] + [line + 1 for line in lines]
+        ends = lines + [length]
+        return [range(a, b) for a, b in zip(starts, ends)]
+    spans_x, spans_y = spans(lines_x, cols), spans(lines_y, rows)
+
+    # Wall segments between neighbouring rooms as (room, room, cells)
+    room = lambda rx, ry: ry * len(spans_x) + rx
+    segments = []
+    for ry, ys in enumerate(spans_y):
+        for rx, x in enumerate(lines_x):
+            segments.append((room(rx, ry), room(rx + 1, ry), [y * cols + x for y in ys]))
+    for rx, xs in enumerate(spans_x):
+        for ry, y in enumerate(lines_y):
+            segments.append((room(rx, ry), room(rx, ry + 1), [y * cols + x for x in xs]))
+    rng.shuffle(segments)
+
+    parent = list(range(len(spans_x) * len(spans_y)))
+    closed = []
+    for a, b, cells in segments:
+        a, b = find(parent, a), find(parent, b)
+        if a != b:
+            parent[b] = a
+            for i in cells:
+                blocked[i] = 0
+        else:
+            closed.append(cells)
+
+    target = int(cols * rows * density)
+    count = sum(blocked)
+    for cells in closed:
+        if count <= target:
+            break
+        for i in cells:
+            blocked[i] = 0
+        count -= len(cells)
+
+GENERATORS = {DENSITY: scatter, WALLS: walls, MAZE: maze}
+
+def generate_level(seed, cols=COLS, rows=ROWS, pattern=DENSITY, density=0.15):
+    # Obstacle cells as a set of (x, y); the same arguments always give the
+    # same level
+    error = board_error(cols, rows)
+    if error:
+        raise ValueError(error)
+    rng = random.Random(seed)
+    blocked = bytearray(cols * rows)
+    GENERATORS[pattern](blocked, cols, rows, density, rng)
+    for x, y in spawn_area(cols, rows):
+        blocked[y * cols + x] = 0
+    # Both snakes' heads must end up in the one free region
+    y = rows // 2
+    connect(blocked, cols, rng, [y * cols + SPAWN_MARGIN, y * cols + cols - SPAWN_MARGIN])
+    return {(i % cols, i // cols) for i in range(cols * rows) if blocked[i]}
+
+def check_level(obstacles, cols, rows):
+    # Error message for a level a round can't use, None if it is fine
+    error = board_error(cols, rows)
+    if error:
+        return error
+    blocked = bytearray(cols * rows)
+    for x, y in obstacles:
+        blocked[y * cols + x] = 1
+    if any(blocked[y * cols + x] for x, y in spawn_area(cols, rows)):
+        return "spawn area blocked"
+    parent, roots = regions(blocked, cols)
+    if len(roots) != 1:
+        return f"free space split into {len(roots)} regions"
+    return None
+
+# ========== LEVEL PACKS ==========
+# A header, then one record per level: the u64 seed it was generated from and
+# the obstacle bitmap (bit y * cols + x, least significant bit first, padded
+# to whole bytes). Every record has the same size, so level i starts at
+# PACK_HEADER.size + i * record size.
+PACK_MAGIC = b"SNKL"
+PACK_VERSION = 2
+# magic, version, pattern index, columns, rows, density, level count
+PACK_HEADER = struct.Struct("<4sBBHHdI")
+SEED = struct.Struct("<Q")
+
+def bitmap_size(cols, rows):
+    return (cols * rows + 7) // 8
+
+def to_bitmap(obstacles, cols, rows):
+    bits = bytearray(bitmap_size(cols, rows))
+    for x, y in obstacles:
+        i = y * cols + x
+        bits[i >> 3] |= 1 << (i & 7)
+    return bits
+
+def from_bitmap(bits, cols, rows):
+    obstacles = set()
+    for byte_index, byte in enumerate(bits):
+        # Most bytes of a sparse level are empty
+        if not byte:
+            continue
+        base = byte_index << 3
+        for bit in range(8):
+            if byte >> bit & 1:
+                i = base + bit
+                obstacles.add((i % cols, i // cols))
+    return obstacles
+
+def write_pack(path, levels, cols, rows, pattern=DENSITY, density=0.0):
+    # levels: iterable of (seed, obstacles), each generate_level(seed, cols,
+    # rows, pattern, density) as LevelPack.recipe() assumes; returns the
+    # number written
+    count = 0
+    with open(path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, cols, rows, 0.0, 0))
+        for seed, obstacles in levels:
+            f.write(SEED.pack(seed) + to_bitmap(obstacles, cols, rows))
+            count += 1
+        f.seek(0)
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, PATTERNS.index(pattern), cols, rows, density, count))
+    return count
+
+class LevelPack:
+    # Read-only view of a pack file through mmap: opening it costs the same
+    # whatever its size, pack[i] decodes just level i
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, pattern, self.cols, self.rows, self.density,
+         self.count) = PACK_HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"{path}: not a version {PACK_VERSION} level pack")
+        error = board_error(self.cols, self.rows)
+        if error:
+            self.close()
+            raise ValueError(f"{path}: {error}")
+        self.pattern = PATTERNS[pattern]
+        self.record_size = SEED.size + bitmap_size(self.cols, self.rows)
+        if len(self.data) != PACK_HEADER.size + self.count * self.record_size:
+            self.close()
+            raise ValueError(f"{path}: truncated, expected {self.count} levels")
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(f"level {index} out of range, the pack has {self.count}")
+        return PACK_HEADER.size + index * self.record_size
+
+    def seed(self, index):
+        return SEED.unpack_from(self.data, self.offset(index))[0]
+
+    def recipe(self, index):
+        # (seed, pattern, density) that generate_level() rebuilds level index from
+        return (self.seed(index), self.pattern, self.density)
+
+    def __getitem__(self, index):
+        start = self.offset(index) + SEED.size
+        return from_bitmap(self.data[start:start + self.record_size - SEED.size], self.cols, self.rows)
+
+    def close(self):
+        self.data.close()
+
+# ========== CLI ==========
+def main():
+    parser = argparse.ArgumentParser(description="Generate, validate and inspect level packs")
+    parser.add_argument("command", choices=["generate", "validate", "info"])
+    parser.add_argument("packs", nargs="+")
+    parser.add_argument("--count", type=int, default=1000, help="levels to generate")
+    parser.add_argument("--pattern", choices=PATTERNS, default=DENSITY)
+    parser.add_argument("--density", type=float, default=0.15, help="share of cells that are obstacles (at most, for maze)")
+    parser.add_argument("--cols", type=int, default=COLS, help="board width in cells")
+    parser.add_argument("--rows", type=int, default=ROWS, help="board height in cells")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first level")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "generate":
+        error = board_error(args.cols, args.rows)
+        if error:
+            parser.error(error)
+        path = args.packs[0]
+        seeds = range(args.seed, args.seed + args.count)
+        levels = ((seed, generate_level(seed, args.cols, args.rows, args.pattern, args.density)) for seed in seeds)
+        count = write_pack(path, levels, args.cols, args.rows, args.pattern, args.density)
+        print(f"{path}: {count} {args.pattern} levels, {args.cols}x{args.rows}, "
+              f"in {time.perf_counter() - start:.1f} s")
+        return
+
+    failed = 0
+    for path in args.packs:
+        try:
+            pack = LevelPack(path)
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(e)
+            continue
+        if args.command == "info":
+            print(f"{path}: {len(pack)} {pack.pattern} levels, {pack.cols}x{pack.rows}, "
+                  f"density {pack.density:.3f}, {pack.record_size} bytes a level")
+            continue
+        for i in range(len(pack)):
+            error = check_level(pack[i], pack.cols, pack.rows)
+            if error:
+                failed += 1
+                print(f"{path}: level {i} (seed {pack.seed(i)}): {error}")
+        pack.close()
+    if args.command == "validate":
+        print(f"{'no' if not failed else failed} bad levels, checked in {time.perf_counter() - start:.1f} s")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
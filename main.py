@@ -1,319 +1,533 @@
-import pygame
-import random
-import sys
-import math
-from settings import *
-from snake import Snake
-from ai import ai_move
-from level import generate_obstacles
-
-# ========== INITIALIZATION ==========
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Artificial Snake")
-clock = pygame.time.Clock()
-
-# FONTS
-try:
-    font_title = pygame.font.SysFont(FONT_BOLD, 80)
-    font_menu = pygame.font.SysFont(FONT_MAIN, 40)
-    font_hud = pygame.font.SysFont(FONT_MAIN, 24)
-except:
-    font_title = pygame.font.Font(None, 80)
-    font_menu = pygame.font.Font(None, 40)
-    font_hud = pygame.font.Font(None, 24)
-
-# ========== GAME STATES ==========
-MENU = 0
-PLAYING_AI = 1
-PLAYING_CLASSIC = 2
-GAME_OVER = 3
-
-# ========== UTILS ==========
-def draw_text(text, font, color, center):
-    surf = font.render(text, True, color)
-    rect = surf.get_rect(center=center)
-    screen.blit(surf, rect)
-
-class Button:
-    def __init__(self, x, y, w, h, text, color):
-        self.rect = pygame.Rect(x - w//2, y - h//2, w, h)
-        self.base_rect = self.rect.copy()
-        self.text = text
-        self.color = color
-        self.hovered = False
-        self.animation_value = 0 # 0 to 1
-
-    def update(self, mouse_pos):
-        self.hovered = self.rect.collidepoint(mouse_pos)
-        if self.hovered:
-            self.animation_value = min(1, self.animation_value + 0.1)
-        else:
-            self.animation_value = max(0, self.animation_value - 0.1)
-            
-        # Grow/Shrink effect
-        offset = int(self.animation_value * 10)
-        self.rect = self.base_rect.inflate(offset, offset)
-
-    def draw(self, screen):
-        # Unique animation: Box corners change
-        border_radius = int(10 + self.animation_value * 20) # Changes rectangle to more rounded
-        
-        # Glow effect
-        if self.animation_value > 0:
-            glow_rect = self.rect.inflate(8, 8)
-            pygame.draw.rect(screen, self.color, glow_rect, border_radius=border_radius, width=2)
-            
-        pygame.draw.rect(screen, self.color, self.rect, border_radius=border_radius)
-        
-        text_color = BLACK if self.animation_value > 0.5 else WHITE
-        draw_text(self.text, font_menu, text_color, self.rect.center)
-
-# ========== GAME CLASS ==========
-class Game:
-    def __init__(self):
-        self.state = MENU
-        self.player = None
-        self.ai_snake = None
-        self.food = None
-        self.obstacles = []
-        self.score = 0
-        self.game_speed = INITIAL_SPEED
-        self.last_move_time = 0
-        self.ai_last_move_time = 0
-        
-        # Menu Buttons
-        self.btn_ai = Button(WIDTH//2, HEIGHT//2 - 20, 300, 60, "PLAY WITH AI", UI_ACCENT)
-        self.btn_classic = Button(WIDTH//2, HEIGHT//2 + 80, 300, 60, "CLASSIC PLAY", UI_SECONDARY)
-        
-        self.particles = []
-        
-        # Load and scale background image for menu
-        try:
-            self.menu_bg = pygame.image.load("snak-pic.jpg").convert()
-            self.menu_bg = pygame.transform.scale(self.menu_bg, (WIDTH, HEIGHT))
-            # Create a semi-transparent overlay surface for better text readability
-            self.overlay = pygame.Surface((WIDTH, HEIGHT))
-            self.overlay.set_alpha(150) # 0-255 opacity
-            self.overlay.fill(BG_COLOR)
-        except:
-            self.menu_bg = None
-            self.overlay = None
-
-    def start_game(self, mode):
-        self.state = mode
-        self.player = Snake(200, HEIGHT//2, PLAYER_COLOR, PLAYER_TAIL, {
-            "UP": pygame.K_UP, "DOWN": pygame.K_DOWN, 
-            "LEFT": pygame.K_LEFT, "RIGHT": pygame.K_RIGHT
-        })
-        
-        self.obstacles = generate_obstacles(MAX_OBSTACLES)
-        
-        if mode == PLAYING_AI:
-            self.ai_snake = Snake(WIDTH - 200, HEIGHT//2, AI_COLOR, AI_TAIL, is_ai=True)
-            self.ai_snake.next_direction = (-1, 0)
-        else:
-            self.ai_snake = None
-            
-        self.food = self.spawn_food()
-        self.score = 0
-        self.ai_score = 0
-        self.game_speed = INITIAL_SPEED
-        self.last_move_time = pygame.time.get_ticks()
-        self.ai_last_move_time = pygame.time.get_ticks()
-
-    def spawn_food(self):
-        while True:
-            pos = (
-                random.randrange(0, WIDTH, CELL_SIZE),
-                random.randrange(0, HEIGHT, CELL_SIZE)
-            )
-            # Don't spawn on obstacles or snakes
-            collision_points = set(self.obstacles)
-            if self.player: collision_points |= set(self.player.body)
-            if self.ai_snake: collision_points |= set(self.ai_snake.body)
-            
-            if pos not in collision_points:
-                return pos
-
-    def add_particles(self, pos, color):
-        for _ in range(10):
-            self.particles.append({
-                "pos": list(pos),
-                "vel": [random.uniform(-2, 2), random.uniform(-2, 2)],
-                "life": 1.0,
-                "color": color
-            })
-
-    def update_particles(self):
-        for p in self.particles[:]:
-            p["pos"][0] += p["vel"][0]
-            p["pos"][1] += p["vel"][1]
-            p["life"] -= 0.02
-            if p["life"] <= 0:
-                self.particles.remove(p)
-
-    def draw_particles(self):
-        for p in self.particles:
-            alpha = int(p["life"] * 255)
-            # Create a surf for transparency
-            s = pygame.Surface((4, 4))
-            s.set_alpha(alpha)
-            s.fill(p["color"])
-            screen.blit(s, p["pos"])
-
-    def handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if self.state == MENU:
-                    if self.btn_ai.hovered:
-                        self.start_game(PLAYING_AI)
-                    elif self.btn_classic.hovered:
-                        self.start_game(PLAYING_CLASSIC)
-                elif self.state == GAME_OVER:
-                    self.state = MENU
-
-            if self.state != MENU:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.state = MENU
-
-    def update(self):
-        current_time = pygame.time.get_ticks()
-        
-        if self.state == MENU:
-            self.btn_ai.update(pygame.mouse.get_pos())
-            self.btn_classic.update(pygame.mouse.get_pos())
-            
-        elif self.state in [PLAYING_AI, PLAYING_CLASSIC]:
-            keys = pygame.key.get_pressed()
-            self.player.handle_input(keys)
-            
-            # Speed scaling logic
-            move_delay = 1000 / self.game_speed
-            
-            # Update Player
-            if current_time - self.last_move_time >= move_delay:
-                self.player.move()
-                self.last_move_time = current_time
-                
-                # Check player collisions
-                if self.player.check_collision(WIDTH, HEIGHT, self.obstacles, self.ai_snake):
-                    self.state = GAME_OVER
-                
-                # Check food
-                if self.player.body[0] == self.food:
-                    self.player.grow = True
-                    self.add_particles(self.food, FOOD_COLOR)
-                    self.food = self.spawn_food()
-                    self.score += 10
-                    # Increase speed
-                    self.game_speed = min(MAX_SPEED, self.game_speed + SPEED_INCREMENT)
-
-            # Update AI
-            if self.state == PLAYING_AI:
-                ai_move_delay = move_delay / AI_SPEED_MULTIPLIER # Slower than player
-                if current_time - self.ai_last_move_time >= ai_move_delay:
-                    ai_move(self.ai_snake, self.food, self.obstacles, self.player.body)
-                    self.ai_snake.move()
-                    self.ai_last_move_time = current_time
-                    
-                    if self.ai_snake.check_collision(WIDTH, HEIGHT, self.obstacles, self.player):
-                        # AI died, give player points or just reset AI? User wants a match.
-                        # For now, if AI dies, game continues or game over? 
-                        # Let's say if AI dies, player wins a bonus and AI respawns.
-                        self.add_particles(self.ai_snake.body[0], AI_COLOR)
-                        self.ai_snake = Snake(WIDTH - 200, HEIGHT//2, AI_COLOR, AI_TAIL, is_ai=True)
-                        self.score += 50
-                    
-                    if self.ai_snake.body[0] == self.food:
-                        self.ai_snake.grow = True
-                        self.add_particles(self.food, FOOD_COLOR)
-                        self.food = self.spawn_food()
-                        self.ai_score += 10
-
-        self.update_particles()
-
-    def draw_grid(self):
-        for x in range(0, WIDTH, CELL_SIZE):
-            pygame.draw.line(screen, GRID_COLOR, (x, 0), (x, HEIGHT))
-        for y in range(0, HEIGHT, CELL_SIZE):
-            pygame.draw.line(screen, GRID_COLOR, (0, y), (WIDTH, y))
-
-    def draw(self, current_time):
-        screen.fill(BG_COLOR)
-        
-        if self.state == MENU:
-            if self.menu_bg:
-                screen.blit(self.menu_bg, (0, 0))
-                if self.overlay:
-                    screen.blit(self.overlay, (0, 0))
-            else:
-                screen.fill(BG_COLOR)
-
-            # Animated title
-            y_offset = math.sin(current_time * 0.005) * 15
-            
-            # Shadow/Glow for title text for better visibility over image
-            draw_text("Artificial Snake", font_title, (0, 0, 0), (WIDTH//2 + 4, HEIGHT//4 + y_offset + 4))
-            draw_text("Artificial Snake", font_title, UI_ACCENT, (WIDTH//2, HEIGHT//4 + y_offset))
-
-
-            self.btn_ai.draw(screen)
-            self.btn_classic.draw(screen)
-            
-        elif self.state in [PLAYING_AI, PLAYING_CLASSIC]:
-            self.draw_grid()
-            
-            # Obstacles
-            for obs in self.obstacles:
-                pygame.draw.rect(screen, OBSTACLE_COLOR, (obs[0]+2, obs[1]+2, CELL_SIZE-4, CELL_SIZE-4), border_radius=5)
-                # Small glow
-                pygame.draw.rect(screen, (50, 50, 50), (obs[0], obs[1], CELL_SIZE, CELL_SIZE), 1, border_radius=5)
-            
-            # Food with pulsing animation
-            pulse = (math.sin(current_time * 0.01) + 1) / 2
-            f_size = 10 + pulse * 8
-            pygame.draw.circle(screen, FOOD_COLOR, (self.food[0] + CELL_SIZE//2, self.food[1] + CELL_SIZE//2), f_size)
-            # Food glow
-            pygame.draw.circle(screen, (255, 255, 0), (self.food[0] + CELL_SIZE//2, self.food[1] + CELL_SIZE//2), f_size + 4, 1)
-            
-            # Snakes
-            if self.ai_snake:
-                self.ai_snake.draw(screen, current_time)
-            self.player.draw(screen, current_time)
-            
-            # Particles
-            self.draw_particles()
-            
-            # HUD
-            if self.state == PLAYING_AI:
-                draw_text(f"YOU: {self.score}", font_hud, PLAYER_COLOR, (100, 30))
-                draw_text(f"AI: {self.ai_score}", font_hud, AI_COLOR, (WIDTH - 100, 30))
-                draw_text("VS AI MODE", font_hud, UI_SECONDARY, (WIDTH//2, 30))
-            else:
-                draw_text(f"SCORE: {self.score}", font_hud, WHITE, (100, 30))
-                draw_text("CLASSIC MODE", font_hud, UI_SECONDARY, (WIDTH//2, 30))
-            
-            draw_text(f"SPEED: {int(self.game_speed)}", font_hud, WHITE, (WIDTH//2, HEIGHT - 30))
-                
-        elif self.state == GAME_OVER:
-            draw_text("GAME OVER", font_title, UI_SECONDARY, (WIDTH//2, HEIGHT//2 - 80))
-            draw_text(f"YOUR SCORE: {self.score}", font_menu, PLAYER_COLOR, (WIDTH//2, HEIGHT//2))
-            if self.ai_snake:
-                draw_text(f"AI SCORE: {self.ai_score}", font_menu, AI_COLOR, (WIDTH//2, HEIGHT//2 + 50))
-            draw_text("CLICK ANYWHERE FOR MENU", font_hud, GRAY, (WIDTH//2, HEIGHT//2 + 120))
-
-        pygame.display.flip()
-
-# ========== MAIN LOOP ==========
-game = Game()
-while True:
-    game.handle_events()
-    game.update()
-    game.draw(pygame.time.get_ticks())
-    clock.tick(FPS)
+import pygame
+import argparse
+import atexit
+import io
+import json
+import os
+import random
+import sys
+import math
+import time
+from functools import lru_cache
+from settings import *
+from engine import Engine, PLAYER, AI, EAT, DIE, FULL, MIN_COLS, MIN_ROWS
+from particles import ParticlePool
+from profiler import NullProfiler, FrameProfiler
+from scheduler import FixedStep
+from replay import Recorder
+from ai_worker import AIWorker
+from camera import Camera
+from level import LevelPack
+
+# ========== INITIALIZATION ==========
+# The window, clock and fonts are set up by init() when the first Game is
+# made, not on import, so tools importing this module (replay, bench) and
+# worker processes re-importing it don't open a window. Only the display and
+# font subsystems are started: pygame.init() also probes audio and joysticks,
+# which the game never uses.
+screen = None
+clock = None
+font_title = font_menu = font_hud = None
+
+FONT_CACHE = os.path.join(CACHE_DIR, "fonts.json")
+MENU_IMAGE = "snak-pic.jpg"
+
+def init():
+    global screen, clock, font_title, font_menu, font_hud
+    if screen is not None:
+        return
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Artificial Snake")
+    # Also starts the SDL timer behind pygame.time.get_ticks()
+    clock = pygame.time.Clock()
+    paths = font_paths([FONT_BOLD, FONT_MAIN])
+    font_title = load_font(paths[FONT_BOLD], 80)
+    font_menu = load_font(paths[FONT_MAIN], 40)
+    font_hud = load_font(paths[FONT_MAIN], 24)
+
+def save_cache(path, data):
+    # Best effort: without a writable CACHE_DIR the next launch just does
+    # the slow work again
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+def font_paths(names):
+    # Font file of each system font name, None when it isn't installed (the
+    # default font is used). Looking a name up scans every installed font
+    # (pygame.font.SysFont runs fc-list on Linux), so the answers are kept in
+    # FONT_CACHE and only looked up again when a cached file has gone.
+    try:
+        with open(FONT_CACHE) as f:
+            paths = json.load(f)
+    except (OSError, ValueError):
+        paths = {}
+    stale = [name for name in names if name not in paths or paths[name] and not os.path.exists(paths[name])]
+    if stale:
+        for name in stale:
+            paths[name] = pygame.font.match_font(name)
+        save_cache(FONT_CACHE, json.dumps(paths, indent=1).encode())
+    return paths
+
+def load_font(path, size):
+    try:
+        return pygame.font.Font(path, size)
+    except (OSError, pygame.error):
+        return pygame.font.Font(None, size)
+
+def load_menu_background():
+    # The menu picture scaled to the window. Decoding the JPEG and scaling it
+    # costs more than the rest of init(), so the scaled picture is kept as an
+    # uncompressed BMP in CACHE_DIR, made again when the picture is newer
+    cached = os.path.join(CACHE_DIR, f"menu-{WIDTH}x{HEIGHT}.bmp")
+    try:
+        if os.path.getmtime(cached) >= os.path.getmtime(MENU_IMAGE):
+            return pygame.image.load(cached).convert()
+    except (OSError, pygame.error):
+        pass
+    image = pygame.transform.scale(pygame.image.load(MENU_IMAGE).convert(), (WIDTH, HEIGHT))
+    data = io.BytesIO()
+    pygame.image.save(image, data, "menu.bmp")
+    save_cache(cached, data.getvalue())
+    return image
+
+# ========== GAME STATES ==========
+MENU = 0
+PLAYING_AI = 1
+PLAYING_CLASSIC = 2
+GAME_OVER = 3
+
+# ========== UTILS ==========
+@lru_cache(maxsize=128)
+def render_text(font, text, color):
+    # Rasterizing text is slow and the same strings (menu, buttons, HUD
+    # values that didn't change) are drawn every frame
+    return font.render(text, True, color)
+
+def draw_text(text, font, color, center):
+    surf = render_text(font, text, color)
+    rect = surf.get_rect(center=center)
+    return screen.blit(surf, rect)
+
+class Button:
+    def __init__(self, x, y, w, h, text, color):
+        self.rect = pygame.Rect(x - w//2, y - h//2, w, h)
+        self.base_rect = self.rect.copy()
+        self.text = text
+        self.color = color
+        self.hovered = False
+        self.animation_value = 0 # 0 to 1
+
+    def update(self, mouse_pos):
+        self.hovered = self.rect.collidepoint(mouse_pos)
+        if self.hovered:
+            self.animation_value = min(1, self.animation_value + 0.1)
+        else:
+            self.animation_value = max(0, self.animation_value - 0.1)
+            
+        # Grow/Shrink effect
+        offset = int(self.animation_value * 10)
+        self.rect = self.base_rect.inflate(offset, offset)
+
+    def draw(self, screen):
+        # Unique animation: Box corners change
+        border_radius = int(10 + self.animation_value * 20) # Changes rectangle to more rounded
+        
+        # Glow effect
+        if self.animation_value > 0:
+            glow_rect = self.rect.inflate(8, 8)
+            pygame.draw.rect(screen, self.color, glow_rect, border_radius=border_radius, width=2)
+            
+        pygame.draw.rect(screen, self.color, self.rect, border_radius=border_radius)
+        
+        text_color = BLACK if self.animation_value > 0.5 else WHITE
+        draw_text(self.text, font_menu, text_color, self.rect.center)
+
+# ========== GAME CLASS ==========
+class Game:
+    def __init__(self, profiler=None, interpolate=False, record_dir=None, ai_worker=None, board=(COLS, ROWS),
+                 levels=None):
+        init()
+        self.state = MENU
+        self.engine = None
+        # Board size in cells; boards bigger than the window scroll with the player
+        self.board = board
+        # Optional level.LevelPack: each round plays the pack level its seed
+        # picks, on the pack's board size (--levels)
+        self.levels = levels
+        if levels is not None:
+            self.board = (levels.cols, levels.rows)
+        self.camera = None
+        # Fixed-rate player / AI ticks, independent of the frame rate
+        self.scheduler = FixedStep()
+        self.last_update_time = 0
+        self.interpolate = interpolate
+        # Every round is recorded; saved to record_dir when it ends (--record)
+        self.recorder = None
+        self.record_dir = record_dir
+        # Optional ai_worker.AIWorker planning the AI's moves off the frame (--ai-worker)
+        self.ai_worker = ai_worker
+        
+        # Menu Buttons
+        self.btn_ai = Button(WIDTH//2, HEIGHT//2 - 20, 300, 60, "PLAY WITH AI", UI_ACCENT)
+        self.btn_classic = Button(WIDTH//2, HEIGHT//2 + 80, 300, 60, "CLASSIC PLAY", UI_SECONDARY)
+        
+        self.particles = ParticlePool()
+        
+        # Play field: grid and obstacles in view, baked once per round and again
+        # whenever the camera scrolls, plus the screen areas drawn last frame
+        # (None means the next frame needs a full flip)
+        self.background = None
+        self.dirty_rects = None
+        
+        # Frame profiling (main.py --profile), F3 toggles the overlay
+        self.profiler = profiler or NullProfiler()
+        self.show_profile = False
+        self.profile_lines = []
+        
+        # Load and scale background image for menu
+        try:
+            self.menu_bg = load_menu_background()
+            # Create a semi-transparent overlay surface for better text readability
+            self.overlay = pygame.Surface((WIDTH, HEIGHT))
+            self.overlay.set_alpha(150) # 0-255 opacity
+            self.overlay.fill(BG_COLOR)
+        except:
+            self.menu_bg = None
+            self.overlay = None
+
+    def start_game(self, mode, seed=None):
+        self.state = mode
+        if seed is None:
+            seed = random.getrandbits(32)
+        cols, rows = self.board
+        level = recipe = None
+        if self.levels:
+            index = seed % len(self.levels)
+            level, recipe = self.levels[index], self.levels.recipe(index)
+        self.engine = Engine(with_ai=mode == PLAYING_AI, seed=seed, cols=cols, rows=rows, level=level,
+                             level_recipe=recipe)
+        self.recorder = Recorder(self.engine)
+        self.engine.profiler = self.profiler
+        self.engine.player.controls = {
+            "UP": pygame.K_UP, "DOWN": pygame.K_DOWN, 
+            "LEFT": pygame.K_LEFT, "RIGHT": pygame.K_RIGHT
+        }
+        self.scheduler.reset()
+        if self.ai_worker:
+            self.ai_worker.refresh(self.engine)
+        self.last_update_time = pygame.time.get_ticks()
+        self.build_background()
+
+    def build_background(self):
+        # Grid and obstacles don't change during a round; only the part the
+        # camera shows is baked
+        self.camera = Camera(self.engine.cols, self.engine.rows)
+        self.camera.center(self.engine.player.body[0])
+        self.background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        self.bake_background()
+
+    def bake_background(self):
+        self.background.fill(BG_COLOR)
+        self.draw_grid(self.background)
+        self.draw_obstacles(self.background)
+        self.dirty_rects = None
+
+    def handle_engine_events(self, events):
+        for kind, who, pos in events:
+            if kind == EAT:
+                self.add_particles(pos, FOOD_COLOR)
+            elif kind == DIE and who == AI:
+                self.add_particles(pos, AI_COLOR)
+            elif (kind == DIE and who == PLAYER) or kind == FULL:
+                self.state = GAME_OVER
+
+    def add_particles(self, pos, color):
+        # Particles live in board pixels, the camera offset is applied on draw
+        self.particles.emit((pos[0] * CELL_SIZE, pos[1] * CELL_SIZE), color, 10)
+
+    def update_particles(self):
+        self.particles.update()
+
+    def draw_particles(self):
+        return self.particles.draw(screen, (self.camera.x, self.camera.y))
+
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if self.state == MENU:
+                    if self.btn_ai.hovered:
+                        self.start_game(PLAYING_AI)
+                    elif self.btn_classic.hovered:
+                        self.start_game(PLAYING_CLASSIC)
+                elif self.state == GAME_OVER:
+                    self.state = MENU
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and self.profiler.enabled:
+                self.show_profile = not self.show_profile
+
+            if self.state != MENU:
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        self.state = MENU
+
+    def update(self):
+        current_time = pygame.time.get_ticks()
+        
+        if self.state == MENU:
+            self.btn_ai.update(pygame.mouse.get_pos())
+            self.btn_classic.update(pygame.mouse.get_pos())
+            
+        elif self.state in [PLAYING_AI, PLAYING_CLASSIC]:
+            engine = self.engine
+            keys = pygame.key.get_pressed()
+            engine.player.handle_input(keys)
+            
+            # Run every player / AI tick that fell due since the last frame, in
+            # order. The AI move comes from the background worker if there is
+            # one, else the engine plans it (action None).
+            dt = current_time - self.last_update_time
+            self.last_update_time = current_time
+            ai_worker = self.ai_worker if self.state == PLAYING_AI else None
+            for snake_id in self.scheduler.advance(dt, self.tick_rates()):
+                if self.state not in [PLAYING_AI, PLAYING_CLASSIC]:
+                    break
+                action = None
+                if snake_id == AI and ai_worker:
+                    action = ai_worker.next_direction(engine)
+                self.handle_engine_events(self.recorder.step(snake_id, action))
+                if ai_worker:
+                    ai_worker.refresh(engine)
+            if self.state == GAME_OVER and self.record_dir:
+                self.save_replay()
+
+        self.update_particles()
+
+    def save_replay(self):
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + f"-{self.engine.seed}.snkr"
+        self.recorder.save(os.path.join(self.record_dir, name))
+
+    def tick_rates(self):
+        # Ticks per second; the AI runs at AI_SPEED_MULTIPLIER of the player
+        rates = {PLAYER: self.engine.game_speed}
+        if self.state == PLAYING_AI:
+            rates[AI] = self.engine.game_speed * AI_SPEED_MULTIPLIER
+        return rates
+
+    def frame_rate(self):
+        # Full rate while anything moves (the menu title always bobs),
+        # IDLE_FPS on the static game over screen
+        if self.state == GAME_OVER:
+            return IDLE_FPS
+        return FPS
+
+    def draw_grid(self, surface):
+        # Lines of the board inside the view; the camera scrolls in whole
+        # cells, so they always fall on the same screen columns / rows
+        camera = self.camera
+        left, top = max(0, -camera.x), max(0, -camera.y)
+        right = min(WIDTH, camera.board_width - camera.x)
+        bottom = min(HEIGHT, camera.board_height - camera.y)
+        for x in range(left, right, CELL_SIZE):
+            pygame.draw.line(surface, GRID_COLOR, (x, top), (x, bottom))
+        for y in range(top, bottom, CELL_SIZE):
+            pygame.draw.line(surface, GRID_COLOR, (left, y), (right, y))
+
+    def draw_obstacles(self, surface):
+        # Walk whichever is smaller: the obstacles or the cells in view
+        obstacles = self.engine.obstacles
+        left, top, right, bottom = self.camera.visible_cells()
+        if len(obstacles) <= (right - left) * (bottom - top):
+            visible = [obs for obs in obstacles if left <= obs[0] < right and top <= obs[1] < bottom]
+        else:
+            visible = [(x, y) for y in range(top, bottom) for x in range(left, right) if (x, y) in obstacles]
+        for obs in visible:
+            x, y = self.camera.to_screen(obs)
+            pygame.draw.rect(surface, OBSTACLE_COLOR, (x+2, y+2, CELL_SIZE-4, CELL_SIZE-4), border_radius=5)
+            # Small glow
+            pygame.draw.rect(surface, (50, 50, 50), (x, y, CELL_SIZE, CELL_SIZE), 1, border_radius=5)
+
+    def draw_profile_overlay(self):
+        # Rolling p50 / p99 per section in ms, refreshed every 30 frames
+        if not self.profile_lines or self.profiler.frame_count % 30 == 0:
+            self.profile_lines = [("section", "p50", "p99")] + [
+                (name, f"{p50:.2f}", f"{p99:.2f}") for name, (p50, p99) in self.profiler.percentiles().items()
+            ]
+        x, y = 20, 60
+        panel = pygame.Rect(x - 10, y - 10, 330, 24 * len(self.profile_lines) + 20)
+        screen.fill(BG_COLOR, panel)
+        for name, p50, p99 in self.profile_lines:
+            screen.blit(render_text(font_hud, name, WHITE), (x, y))
+            screen.blit(render_text(font_hud, p50, UI_ACCENT), (x + 200, y))
+            screen.blit(render_text(font_hud, p99, UI_SECONDARY), (x + 260, y))
+            y += 24
+        return panel
+
+    def draw_playfield(self, current_time):
+        # Restore the baked background only where the last frame drew, draw the
+        # moving parts and push just those areas to the display
+        engine = self.engine
+        profiler = self.profiler
+        camera = self.camera
+        with profiler.section("draw/background"):
+            if camera.follow(engine.player.body[0]):
+                self.bake_background()
+            if self.dirty_rects is None:
+                screen.blit(self.background, (0, 0))
+            else:
+                for rect in self.dirty_rects:
+                    screen.blit(self.background, rect, rect)
+        rects = []
+        
+        # Food with pulsing animation
+        with profiler.section("draw/food"):
+            pulse = (math.sin(current_time * 0.01) + 1) / 2
+            f_size = 10 + pulse * 8
+            fx, fy = camera.to_screen(engine.food)
+            if -CELL_SIZE < fx < WIDTH and -CELL_SIZE < fy < HEIGHT:
+                rects.append(pygame.draw.circle(screen, FOOD_COLOR, (fx + CELL_SIZE//2, fy + CELL_SIZE//2), f_size))
+                # Food glow
+                rects.append(pygame.draw.circle(screen, (255, 255, 0), (fx + CELL_SIZE//2, fy + CELL_SIZE//2), f_size + 4, 1))
+        
+        # Snakes
+        with profiler.section("draw/snakes"):
+            # Optionally slide snakes between their last and next cell
+            rates = self.tick_rates()
+            if engine.ai_snake:
+                alpha = self.scheduler.alpha(AI, rates[AI]) if self.interpolate else 1.0
+                rects += engine.ai_snake.draw(screen, current_time, alpha, camera)
+            alpha = self.scheduler.alpha(PLAYER, rates[PLAYER]) if self.interpolate else 1.0
+            rects += engine.player.draw(screen, current_time, alpha, camera)
+        
+        # Particles
+        with profiler.section("draw/particles"):
+            rects += self.draw_particles()
+        
+        # HUD
+        with profiler.section("draw/hud"):
+            if self.state == PLAYING_AI:
+                rects.append(draw_text(f"YOU: {engine.score}", font_hud, PLAYER_COLOR, (100, 30)))
+                rects.append(draw_text(f"AI: {engine.ai_score}", font_hud, AI_COLOR, (WIDTH - 100, 30)))
+                rects.append(draw_text("VS AI MODE", font_hud, UI_SECONDARY, (WIDTH//2, 30)))
+            else:
+                rects.append(draw_text(f"SCORE: {engine.score}", font_hud, WHITE, (100, 30)))
+                rects.append(draw_text("CLASSIC MODE", font_hud, UI_SECONDARY, (WIDTH//2, 30)))
+            
+            rects.append(draw_text(f"SPEED: {int(engine.game_speed)}", font_hud, WHITE, (WIDTH//2, HEIGHT - 30)))
+        
+        if self.show_profile:
+            with profiler.section("draw/overlay"):
+                rects.append(self.draw_profile_overlay())
+        
+        with profiler.section("draw/display"):
+            if self.dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.dirty_rects + rects)
+        self.dirty_rects = rects
+
+    def draw(self, current_time):
+        if self.state in [PLAYING_AI, PLAYING_CLASSIC]:
+            self.draw_playfield(current_time)
+            return
+        
+        # Menu and game over screens repaint everything
+        self.dirty_rects = None
+        screen.fill(BG_COLOR)
+        
+        if self.state == MENU:
+            if self.menu_bg:
+                screen.blit(self.menu_bg, (0, 0))
+                if self.overlay:
+                    screen.blit(self.overlay, (0, 0))
+            else:
+                screen.fill(BG_COLOR)
+
+            # Animated title
+            y_offset = math.sin(current_time * 0.005) * 15
+            
+            # Shadow/Glow for title text for better visibility over image
+            draw_text("Artificial Snake", font_title, (0, 0, 0), (WIDTH//2 + 4, HEIGHT//4 + y_offset + 4))
+            draw_text("Artificial Snake", font_title, UI_ACCENT, (WIDTH//2, HEIGHT//4 + y_offset))
+
+
+            self.btn_ai.draw(screen)
+            self.btn_classic.draw(screen)
+            
+        elif self.state == GAME_OVER:
+            draw_text("GAME OVER", font_title, UI_SECONDARY, (WIDTH//2, HEIGHT//2 - 80))
+            draw_text(f"YOUR SCORE: {self.engine.score}", font_menu, PLAYER_COLOR, (WIDTH//2, HEIGHT//2))
+            if self.engine.ai_snake:
+                draw_text(f"AI SCORE: {self.engine.ai_score}", font_menu, AI_COLOR, (WIDTH//2, HEIGHT//2 + 50))
+            draw_text("CLICK ANYWHERE FOR MENU", font_hud, GRAY, (WIDTH//2, HEIGHT//2 + 120))
+
+        if self.show_profile:
+            self.draw_profile_overlay()
+        pygame.display.flip()
+
+# ========== MAIN LOOP ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Artificial Snake")
+    parser.add_argument("--profile", nargs="?", const="frame_trace.json", metavar="TRACE",
+                        help="time every frame (F3 shows p50/p99) and write a Chrome trace to TRACE on exit")
+    parser.add_argument("--interpolate", action="store_true",
+                        help="draw snakes sliding between cells instead of jumping once per tick")
+    parser.add_argument("--ai-worker", choices=["thread", "process"],
+                        help="plan the AI's moves in a background thread / process instead of in the frame")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save a replay of every finished round to DIR (see replay.py)")
+    parser.add_argument("--board", default=f"{COLS}x{ROWS}", metavar="COLSxROWS",
+                        help=f"board size in cells, up to {MAX_BOARD}x{MAX_BOARD}; bigger than the window scrolls")
+    parser.add_argument("--levels", metavar="PACK",
+                        help="play the levels of a pack made with level.py (its board size overrides --board)")
+    args = parser.parse_args()
+    try:
+        board = cols, rows = tuple(int(n) for n in args.board.lower().split("x"))
+    except ValueError:
+        parser.error(f"--board: expected COLSxROWS, got {args.board}")
+    if not (MIN_COLS <= cols <= MAX_BOARD and MIN_ROWS <= rows <= MAX_BOARD):
+        parser.error(f"--board: must be {MIN_COLS}x{MIN_ROWS} to {MAX_BOARD}x{MAX_BOARD} cells")
+    levels = None
+    if args.levels:
+        try:
+            levels = LevelPack(args.levels)
+        except (OSError, ValueError) as e:
+            parser.error(f"--levels: {e}")
+        if not levels:
+            parser.error(f"--levels: {args.levels} holds no levels")
+    
+    profiler = NullProfiler()
+    if args.profile:
+        profiler = FrameProfiler()
+        atexit.register(profiler.write_trace, args.profile)
+    
+    ai_worker = None
+    if args.ai_worker:
+        ai_worker = AIWorker(args.ai_worker)
+        atexit.register(ai_worker.close)
+    
+    game = Game(profiler, interpolate=args.interpolate, record_dir=args.record, ai_worker=ai_worker, board=board,
+                levels=levels)
+    while True:
+        with profiler.section("handle_events"):
+            game.handle_events()
+        with profiler.section("update"):
+            game.update()
+        with profiler.section("draw"):
+            game.draw(pygame.time.get_ticks())
+        with profiler.section("idle"):
+            clock.tick(game.frame_rate())
+        profiler.end_frame()
+
@@ -0,0 +1,79 @@
+import numpy as np
+import pygame
+
+PARTICLE_SIZE = 4
+FADE_PER_FRAME = 0.02
+
+class ParticlePool:
+    # Fixed-capacity particle system. Live particles are the first `count`
+    # rows of parallel arrays; dead ones are filled by swapping in live
+    # particles from the end, so nothing is allocated after construction.
+    # Each (colour, alpha) square is rendered once and reused.
+    def __init__(self, capacity=512, seed=None):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.int32)  # index into palette
+        self.count = 0
+        self.palette = []
+        self.sprites = {}
+        self.rng = np.random.default_rng(seed)
+
+    def emit(self, pos, color, amount=10):
+        # Bursts beyond capacity are clipped rather than growing the pool
+        start = self.count
+        end = min(self.capacity, start + amount)
+        if end == start:
+            return
+        if color not in self.palette:
+            self.palette.append(color)
+        self.pos[start:end] = pos
+        self.vel[start:end] = self.rng.uniform(-2, 2, (end - start, 2))
+        self.life[start:end] = 1.0
+        self.color[start:end] = self.palette.index(color)
+        self.count = end
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        self.pos[:n] += self.vel[:n]
+        self.life[:n] -= FADE_PER_FRAME
+
+        alive = self.life[:n] > 0
+        live = int(alive.sum())
+        if live == n:
+            return
+        # Swap-remove: holes below the new count take the live particles
+        # sitting above it
+        holes = np.flatnonzero(~alive[:live])
+        movers = live + np.flatnonzero(alive[live:])
+        for array in (self.pos, self.vel, self.life, self.color):
+            array[holes] = array[movers]
+        self.count = live
+
+    def sprite(self, color_index, alpha):
+        key = (color_index, alpha)
+        surf = self.sprites.get(key)
+        if surf is None:
+            surf = pygame.Surface((PARTICLE_SIZE, PARTICLE_SIZE))
+            surf.set_alpha(alpha)
+            surf.fill(self.palette[color_index])
+            self.sprites[key] = surf
+        return surf
+
+    def draw(self, surface, offset=(0, 0)):
+        # Returns the rects drawn, for dirty-rect display updates. Particles
+        # live in board pixels; offset is subtracted to get screen pixels.
+        n = self.count
+        if n == 0:
+            return []
+        alphas = (self.life[:n] * 255).astype(np.int32).tolist()
+        colors = self.color[:n].tolist()
+        if offset == (0, 0):
+            positions = self.pos[:n].tolist()
+        else:
+            positions = (self.pos[:n] - offset).tolist()
+        sprite = self.sprite
+        return surface.blits([(sprite(c, a), p) for c, a, p in zip(colors, alphas, positions)])
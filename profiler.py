@@ -0,0 +1,84 @@
+import json
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+class NullProfiler:
+    # Used when instrumentation is off: every section is the same no-op
+    # context manager, so instrumented code costs one call per section
+    enabled = False
+    _section = nullcontext()
+
+    def section(self, name):
+        return self._section
+
+    def end_frame(self):
+        pass
+
+class Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, perf_counter_ns())
+
+class FrameProfiler:
+    # Records named, possibly nested sections per frame. Keeps a rolling
+    # window of per-frame totals for percentiles and the raw sections of the
+    # last max_trace_frames frames for a Chrome trace (chrome://tracing,
+    # Perfetto) written by write_trace().
+    enabled = True
+
+    def __init__(self, window=300, max_trace_frames=3600):
+        self.window = window
+        self.samples = {}  # section name -> deque of per-frame totals in ms
+        self.totals = {}   # section name -> ns spent in the current frame
+        self.current = []  # (name, start_ns, duration_ns) of the current frame
+        self.frames = deque(maxlen=max_trace_frames)
+        self.origin = perf_counter_ns()
+        self.frame_count = 0
+
+    def section(self, name):
+        return Section(self, name)
+
+    def record(self, name, start, end):
+        self.totals[name] = self.totals.get(name, 0) + end - start
+        self.current.append((name, start, end - start))
+
+    def end_frame(self):
+        # Sections that didn't run this frame count as 0 ms for it
+        for name in self.totals:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+        for name, samples in self.samples.items():
+            samples.append(self.totals.get(name, 0) / 1e6)
+        self.frames.append(self.current)
+        self.totals = {}
+        self.current = []
+        self.frame_count += 1
+
+    def percentiles(self):
+        # {section: (p50, p99)} in ms over the rolling window
+        stats = {}
+        for name, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            last = len(ordered) - 1
+            stats[name] = (ordered[int(last * 0.5)], ordered[int(last * 0.99)])
+        return stats
+
+    def write_trace(self, path):
+        events = []
+        for frame in self.frames:
+            for name, start, duration in frame:
+                events.append({
+                    "name": name, "ph": "X", "pid": 1, "tid": 1,
+                    "ts": (start - self.origin) / 1000, "dur": duration / 1000,
+                })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
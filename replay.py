@@ -0,0 +1,239 @@
+# Compact game replays: seed, board settings and the direction changes made on
+# each tick, enough to re-run a game exactly through the engine.
+#   python replay.py verify REPLAY...          re-run headlessly, check scores
+#   python replay.py play REPLAY [--speed 2]   watch it through Game.draw
+#   python replay.py info REPLAY...
+#
+# File layout: a fixed header (HEADER) followed by a zlib-compressed bit
+# stream, one record per engine tick:
+#   1 bit  which snake ticked (only in games with the AI snake)
+#   1 bit  direction changed
+#   2 bits new direction as an index into DIRECTIONS (only when changed)
+# Most ticks keep their direction, so a long game costs about 2 bits a tick
+# before compression. Games on a generated level (flag LEVEL) store the
+# generate_level arguments (LEVEL_RECIPE) between the header and the stream;
+# other fixed levels (flag LEVEL_BITMAP) start the compressed stream with
+# their obstacle bitmap, in level pack layout.
+import argparse
+import struct
+import sys
+import time
+import zlib
+
+from engine import Engine, PLAYER, AI
+from ai import DIRECTIONS
+from level import PATTERNS, generate_level, bitmap_size, to_bitmap, from_bitmap
+
+MAGIC = b"SNKR"
+VERSION = 2
+# magic, version, flags, board columns, board rows, obstacles, seed, ticks, score, ai score
+HEADER = struct.Struct("<4sBBHHHQIii")
+WITH_AI = 1
+LEVEL = 2
+LEVEL_BITMAP = 4
+# level seed, pattern index, density
+LEVEL_RECIPE = struct.Struct("<QBd")
+
+class BitWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.acc = 0
+        self.count = 0
+
+    def write(self, value, bits):
+        # Least significant bit first
+        self.acc |= value << self.count
+        self.count += bits
+        while self.count >= 8:
+            self.data.append(self.acc & 0xFF)
+            self.acc >>= 8
+            self.count -= 8
+
+    def getvalue(self):
+        if self.count:
+            return bytes(self.data) + bytes([self.acc])
+        return bytes(self.data)
+
+class Recorder:
+    # Steps an engine one snake at a time (the way Game and the tournament
+    # drive it) and records every tick. The engine must have been seeded.
+    def __init__(self, engine):
+        if engine.seed is None:
+            raise ValueError("recording needs an engine created with a seed")
+        self.engine = engine
+        self.bits = BitWriter()
+
+    def step(self, snake_id, action=None):
+        engine = self.engine
+        if engine.over:
+            return []
+        # Read the direction off the snake that moves: a dying AI is replaced
+        # inside step()
+        snake = engine.player if snake_id == PLAYER else engine.ai_snake
+        before = snake.direction
+        events = engine.step({snake_id: action})
+
+        if engine.with_ai:
+            self.bits.write(snake_id == AI, 1)
+        if snake.direction == before:
+            self.bits.write(0, 1)
+        else:
+            self.bits.write(1 | DIRECTIONS.index(snake.direction) << 1, 3)
+        return events
+
+    def save(self, path):
+        engine = self.engine
+        flags = WITH_AI if engine.with_ai else 0
+        recipe = b""
+        stream = b""
+        if engine.level_recipe is not None:
+            flags |= LEVEL
+            seed, pattern, density = engine.level_recipe
+            recipe = LEVEL_RECIPE.pack(seed, PATTERNS.index(pattern), density)
+        elif engine.level is not None:
+            flags |= LEVEL_BITMAP
+            stream = bytes(to_bitmap(engine.level, engine.cols, engine.rows))
+        header = HEADER.pack(MAGIC, VERSION, flags, engine.cols, engine.rows, engine.obstacle_count,
+                             engine.seed, engine.ticks, engine.score, engine.ai_score)
+        with open(path, "wb") as f:
+            f.write(header + recipe + zlib.compress(stream + self.bits.getvalue(), 9))
+
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        (magic, version, flags, self.cols, self.rows, self.obstacle_count,
+         self.seed, self.ticks, self.score, self.ai_score) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} replay")
+        self.with_ai = bool(flags & WITH_AI)
+        self.path = path
+        self.size = len(data)
+        start = HEADER.size
+        self.level_recipe = None
+        if flags & LEVEL:
+            seed, pattern, density = LEVEL_RECIPE.unpack_from(data, start)
+            self.level_recipe = (seed, PATTERNS[pattern], density)
+            start += LEVEL_RECIPE.size
+        self.stream = zlib.decompress(data[start:])
+        self.level = None
+        if flags & LEVEL_BITMAP:
+            size = bitmap_size(self.cols, self.rows)
+            self.level = from_bitmap(self.stream[:size], self.cols, self.rows)
+            self.stream = self.stream[size:]
+        self.fixed_level = bool(flags & (LEVEL | LEVEL_BITMAP))
+
+    def obstacles(self):
+        # The fixed level's obstacle cells, None for a game on random obstacles.
+        # A generated level is built on demand: info doesn't need it.
+        if self.level_recipe is not None:
+            seed, pattern, density = self.level_recipe
+            return generate_level(seed, self.cols, self.rows, pattern, density)
+        return self.level
+
+    def engine(self):
+        return Engine(with_ai=self.with_ai, obstacle_count=self.obstacle_count, seed=self.seed,
+                      cols=self.cols, rows=self.rows, level=self.obstacles(), level_recipe=self.level_recipe)
+
+    def actions(self):
+        # (snake_id, direction or None to keep going) per recorded tick
+        bits = [(byte >> i) & 1 for byte in self.stream for i in range(8)]
+        i = 0
+        for _ in range(self.ticks):
+            snake_id = PLAYER
+            if self.with_ai:
+                snake_id = AI if bits[i] else PLAYER
+                i += 1
+            if bits[i]:
+                yield snake_id, DIRECTIONS[bits[i + 1] | bits[i + 2] << 1]
+                i += 3
+            else:
+                yield snake_id, None
+                i += 1
+
+def step(engine, snake_id, direction):
+    # Apply one recorded tick. Keeping the direction is spelled out, since the
+    # engine would plan a fresh move for the AI snake given None.
+    if direction is None:
+        direction = (engine.player if snake_id == PLAYER else engine.ai_snake).direction
+    return engine.step({snake_id: direction})
+
+def verify(replay):
+    # Re-run the game headlessly; returns an error message, None if it matches
+    engine = replay.engine()
+    for snake_id, direction in replay.actions():
+        step(engine, snake_id, direction)
+    got = (engine.ticks, engine.score, engine.ai_score)
+    want = (replay.ticks, replay.score, replay.ai_score)
+    if got != want:
+        return "ticks/score/ai score %d/%d/%d, recorded %d/%d/%d" % (got + want)
+    return None
+
+def play(replay, speed=1.0):
+    # Visual replay at game pace (times speed) through the normal Game drawing
+    import pygame
+    import main
+    game = main.Game(board=(replay.cols, replay.rows))
+    game.start_game(main.PLAYING_AI if replay.with_ai else main.PLAYING_CLASSIC, seed=replay.seed)
+    game.engine.obstacle_count = replay.obstacle_count
+    game.engine.level = replay.obstacles()
+    game.engine.level_recipe = replay.level_recipe
+    game.engine.reset(replay.seed)
+    game.build_background()
+    actions = replay.actions()
+    last = pygame.time.get_ticks()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or event.type == pygame.MOUSEBUTTONDOWN and game.state == main.GAME_OVER:
+                pygame.quit()
+                return
+        now = pygame.time.get_ticks()
+        if game.state != main.GAME_OVER:
+            for _ in game.scheduler.advance((now - last) * speed, game.tick_rates()):
+                action = next(actions, None)
+                if action is None:
+                    game.state = main.GAME_OVER
+                    break
+                snake_id, direction = action
+                game.handle_engine_events(step(game.engine, snake_id, direction))
+        last = now
+        game.update_particles()
+        game.draw(now)
+        main.clock.tick(main.FPS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify, inspect or watch recorded games")
+    parser.add_argument("command", choices=["verify", "play", "info"])
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed for play")
+    args = parser.parse_args()
+
+    if args.command == "play":
+        play(Replay(args.replays[0]), args.speed)
+        return
+
+    failed = 0
+    ticks = 0
+    start = time.perf_counter()
+    for path in args.replays:
+        replay = Replay(path)
+        if args.command == "info":
+            print(f"{path}: seed {replay.seed}, {replay.cols}x{replay.rows}, "
+                  f"{'ai' if replay.with_ai else 'classic'}{', fixed level' if replay.fixed_level else ''}, "
+                  f"{replay.ticks} ticks, "
+                  f"score {replay.score}/{replay.ai_score}, {replay.size} bytes")
+            continue
+        error = verify(replay)
+        ticks += replay.ticks
+        if error:
+            failed += 1
+            print(f"{path}: MISMATCH {error}")
+    if args.command == "verify":
+        elapsed = time.perf_counter() - start
+        print(f"{len(args.replays) - failed}/{len(args.replays)} replays match, "
+              f"{ticks} ticks in {elapsed:.2f} s ({ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
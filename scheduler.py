@@ -0,0 +1,38 @@
+class FixedStep:
+    # Accumulator-based fixed timestep for several independent tick rates.
+    # Time left over after a frame's ticks carries into the next frame, so a
+    # late frame is made up by extra ticks instead of being lost. At most
+    # max_catch_up ticks per clock run in one frame; any backlog beyond that
+    # is dropped (keeping the phase) so a long stall can't snowball.
+    def __init__(self, max_catch_up=4):
+        self.max_catch_up = max_catch_up
+        self.elapsed = {}  # clock name -> ms accumulated since its last tick
+
+    def reset(self):
+        self.elapsed = {}
+
+    def advance(self, dt, rates):
+        # dt: ms since the previous call. rates: {clock: ticks per second},
+        # earlier clocks win ties. Returns one clock name per due tick, in the
+        # order the ticks fall within the frame.
+        due = []
+        for order, (name, rate) in enumerate(rates.items()):
+            interval = 1000 / rate
+            elapsed = self.elapsed.get(name, 0.0) + dt
+            count = int(elapsed // interval)
+            if count > self.max_catch_up:
+                count = self.max_catch_up
+                elapsed %= interval
+            else:
+                elapsed -= count * interval
+            # The k-th tick fires k intervals after this clock's last tick
+            start = self.elapsed.get(name, 0.0)
+            for k in range(1, count + 1):
+                due.append((k * interval - start, order, name))
+            self.elapsed[name] = elapsed
+        due.sort()
+        return [name for _, _, name in due]
+
+    def alpha(self, name, rate):
+        # How far (0..1) the clock is between its last tick and the next one
+        return min(1.0, self.elapsed.get(name, 0.0) * rate / 1000)
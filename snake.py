@@ -1,116 +1,252 @@
-import pygame
-import math
-from settings import CELL_SIZE, PLAYER_COLOR, PLAYER_TAIL
-
-class Snake:
-    def __init__(self, x, y, color, tail_color, controls=None, is_ai=False):
-        # Position is grid-based
-        self.body = [(x, y), (x - CELL_SIZE, y), (x - 2 * CELL_SIZE, y)]
-        self.direction = (1, 0)
-        self.next_direction = (1, 0)
-        self.color = color
-        self.tail_color = tail_color
-        self.controls = controls
-        self.is_ai = is_ai
-        self.grow = False
-        self.alive = True
-        self.score = 0
-        self.move_counter = 0
-
-    def handle_input(self, keys):
-        if not self.controls:
-            return
-        
-        if keys[self.controls["UP"]] and self.direction != (0, 1):
-            self.next_direction = (0, -1)
-        elif keys[self.controls["DOWN"]] and self.direction != (0, -1):
-            self.next_direction = (0, 1)
-        elif keys[self.controls["LEFT"]] and self.direction != (1, 0):
-            self.next_direction = (-1, 0)
-        elif keys[self.controls["RIGHT"]] and self.direction != (-1, 0):
-            self.next_direction = (1, 0)
-
-    def move(self):
-        if not self.alive:
-            return
-
-        self.direction = self.next_direction
-        head_x, head_y = self.body[0]
-        dx, dy = self.direction
-        
-        new_head = (head_x + dx * CELL_SIZE, head_y + dy * CELL_SIZE)
-        
-        self.body.insert(0, new_head)
-        if not self.grow:
-            self.body.pop()
-        else:
-            self.grow = False
-            self.score += 1
-
-    def check_collision(self, width, height, obstacles, other_snake=None):
-        head = self.body[0]
-        
-        # Wall collision
-        if head[0] < 0 or head[0] >= width or head[1] < 0 or head[1] >= height:
-            self.alive = False
-            return True
-            
-        # Self collision
-        if head in self.body[1:]:
-            self.alive = False
-            return True
-            
-        # Obstacle collision
-        if head in obstacles:
-            self.alive = False
-            return True
-
-        # Other snake collision
-        if other_snake and head in other_snake.body:
-            self.alive = False
-            return True
-            
-        return False
-
-    def draw(self, screen, current_time):
-        for i, segment in enumerate(self.body):
-            # Gradient color from head to tail
-            ratio = i / len(self.body)
-            r = int(self.color[0] * (1 - ratio) + self.tail_color[0] * ratio)
-            g = int(self.color[1] * (1 - ratio) + self.tail_color[1] * ratio)
-            b = int(self.color[2] * (1 - ratio) + self.tail_color[2] * ratio)
-            
-            # Breathing effect for segments
-            size_offset = math.sin(current_time * 0.01 + i * 0.5) * 2
-            rect_size = CELL_SIZE - 2 + size_offset
-            
-            rect = pygame.Rect(
-                segment[0] + (CELL_SIZE - rect_size) // 2,
-                segment[1] + (CELL_SIZE - rect_size) // 2,
-                rect_size,
-                rect_size
-            )
-            
-            pygame.draw.rect(screen, (r, g, b), rect, border_radius=int(CELL_SIZE//4))
-            
-            # Draw eyes on the head
-            if i == 0:
-                eye_color = (255, 255, 255)
-                eye_size = 4
-                # Position eyes based on direction
-                dx, dy = self.direction
-                if dx == 1: # Right
-                    e1 = (segment[0] + CELL_SIZE - 8, segment[1] + 6)
-                    e2 = (segment[0] + CELL_SIZE - 8, segment[1] + CELL_SIZE - 10)
-                elif dx == -1: # Left
-                    e1 = (segment[0] + 4, segment[1] + 6)
-                    e2 = (segment[0] + 4, segment[1] + CELL_SIZE - 10)
-                elif dy == -1: # Up
-                    e1 = (segment[0] + 6, segment[1] + 4)
-                    e2 = (segment[0] + CELL_SIZE - 10, segment[1] + 4)
-                else: # Down
-                    e1 = (segment[0] + 6, segment[1] + CELL_SIZE - 8)
-                    e2 = (segment[0] + CELL_SIZE - 10, segment[1] + CELL_SIZE - 8)
-                
-                pygame.draw.circle(screen, eye_color, e1, eye_size)
-                pygame.draw.circle(screen, eye_color, e2, eye_size)
\ No newline at end of file
+import math
+from collections import deque
+from itertools import islice
+from settings import CELL_SIZE, PLAYER_COLOR, PLAYER_TAIL
+
+# Cells are packed into one int: grid row in the high bits, grid column in the
+# low 16. Both are offset by 1 so a head that just left the board (column or
+# row -1) still packs to a unique non-negative value.
+PACK_SHIFT = 16
+PACK_MASK = (1 << PACK_SHIFT) - 1
+
+def pack_cell(pos):
+    return ((pos[1] + 1) << PACK_SHIFT) | (pos[0] + 1)
+
+def unpack_cell(cell):
+    return ((cell & PACK_MASK) - 1, (cell >> PACK_SHIFT) - 1)
+
+class BodyView:
+    # Read-only, head-first sequence of (x, y) grid cells over a snake's packed
+    # cells. Membership tests use the occupancy counts and are O(1).
+    __slots__ = ("cells", "counts")
+
+    def __init__(self, cells, counts):
+        self.cells = cells
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return map(unpack_cell, self.cells)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [unpack_cell(cell) for cell in list(self.cells)[index]]
+        return unpack_cell(self.cells[index])
+
+    def __contains__(self, pos):
+        return pack_cell(pos) in self.counts
+
+def load_pygame():
+    # pygame is imported when the first sprite is rendered: headless code
+    # (engine, AI workers, tournaments) only needs the movement rules and
+    # starts much faster without it
+    import pygame
+    return pygame
+
+# Number of colours the head-to-tail gradient is quantized to
+GRADIENT_STEPS = 64
+
+class SnakeSprites:
+    # Pre-rendered cell-sized segment sprites for one colour pair, keyed by
+    # gradient step, inset offset and size of the rounded rect (the breathing
+    # effect only produces a handful of integer sizes), plus head sprites with
+    # the eyes baked in for each direction.
+    def __init__(self, color, tail_color):
+        self.colors = []
+        for step in range(GRADIENT_STEPS):
+            ratio = step / GRADIENT_STEPS
+            self.colors.append(tuple(int(c * (1 - ratio) + t * ratio) for c, t in zip(color, tail_color)))
+        self.segments = {}
+        self.heads = {}
+
+    def render(self, color, offset, size):
+        pygame = load_pygame()
+        surf = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
+        pygame.draw.rect(surf, color, (offset, offset, size, size), border_radius=int(CELL_SIZE//4))
+        return surf
+
+    def segment(self, step, offset, size):
+        key = (step, offset, size)
+        sprite = self.segments.get(key)
+        if sprite is None:
+            sprite = self.segments[key] = self.render(self.colors[step], offset, size)
+        return sprite
+
+    def head(self, direction, offset, size):
+        key = (direction, offset, size)
+        sprite = self.heads.get(key)
+        if sprite is None:
+            pygame = load_pygame()
+            sprite = self.heads[key] = self.render(self.colors[0], offset, size)
+            eye_color = (255, 255, 255)
+            eye_size = 4
+            # Position eyes based on direction
+            dx, dy = direction
+            if dx == 1: # Right
+                e1 = (CELL_SIZE - 8, 6)
+                e2 = (CELL_SIZE - 8, CELL_SIZE - 10)
+            elif dx == -1: # Left
+                e1 = (4, 6)
+                e2 = (4, CELL_SIZE - 10)
+            elif dy == -1: # Up
+                e1 = (6, 4)
+                e2 = (CELL_SIZE - 10, 4)
+            else: # Down
+                e1 = (6, CELL_SIZE - 8)
+                e2 = (CELL_SIZE - 10, CELL_SIZE - 8)
+            pygame.draw.circle(sprite, eye_color, e1, eye_size)
+            pygame.draw.circle(sprite, eye_color, e2, eye_size)
+        return sprite
+
+_sprites = {}
+
+def get_sprites(color, tail_color):
+    sprites = _sprites.get((color, tail_color))
+    if sprites is None:
+        sprites = _sprites[(color, tail_color)] = SnakeSprites(color, tail_color)
+    return sprites
+
+class Snake:
+    __slots__ = ("cells", "counts", "body", "direction", "next_direction", "color", "tail_color",
+                 "controls", "is_ai", "grow", "alive", "cause", "score", "move_counter")
+
+    def __init__(self, x, y, color, tail_color, controls=None, is_ai=False):
+        # Position is grid-based: head-first deque of packed cells plus a count
+        # of segments per cell, so moves and collision tests are O(1)
+        self.cells = deque(pack_cell((x - i, y)) for i in range(3))
+        self.counts = {}
+        for cell in self.cells:
+            self.counts[cell] = self.counts.get(cell, 0) + 1
+        self.body = BodyView(self.cells, self.counts)
+        self.direction = (1, 0)
+        self.next_direction = (1, 0)
+        self.color = color
+        self.tail_color = tail_color
+        self.controls = controls
+        self.is_ai = is_ai
+        self.grow = False
+        self.alive = True
+        self.cause = None  # what killed it: "wall", "self", "obstacle", "snake" or "head" (head-on, arena only)
+        self.score = 0
+        self.move_counter = 0
+
+    def handle_input(self, keys):
+        if not self.controls:
+            return
+        
+        if keys[self.controls["UP"]] and self.direction != (0, 1):
+            self.next_direction = (0, -1)
+        elif keys[self.controls["DOWN"]] and self.direction != (0, -1):
+            self.next_direction = (0, 1)
+        elif keys[self.controls["LEFT"]] and self.direction != (1, 0):
+            self.next_direction = (-1, 0)
+        elif keys[self.controls["RIGHT"]] and self.direction != (-1, 0):
+            self.next_direction = (1, 0)
+
+    def move(self):
+        if not self.alive:
+            return
+
+        self.direction = self.next_direction
+        dx, dy = self.direction
+        counts = self.counts
+        
+        new_head = self.cells[0] + dx + (dy << PACK_SHIFT)
+        
+        self.cells.appendleft(new_head)
+        counts[new_head] = counts.get(new_head, 0) + 1
+        if not self.grow:
+            tail = self.cells.pop()
+            if counts[tail] == 1:
+                del counts[tail]
+            else:
+                counts[tail] -= 1
+        else:
+            self.grow = False
+            self.score += 1
+
+    def check_collision(self, cols, rows, obstacles, other_snake=None):
+        cell = self.cells[0]
+        head = unpack_cell(cell)
+        
+        # Wall collision
+        if head[0] < 0 or head[0] >= cols or head[1] < 0 or head[1] >= rows:
+            self.alive = False
+            self.cause = "wall"
+            return True
+            
+        # Self collision: the head cell holds more than one segment
+        if self.counts[cell] > 1:
+            self.alive = False
+            self.cause = "self"
+            return True
+            
+        # Obstacle collision
+        if head in obstacles:
+            self.alive = False
+            self.cause = "obstacle"
+            return True
+
+        # Other snake collision
+        if other_snake and cell in other_snake.counts:
+            self.alive = False
+            self.cause = "snake"
+            return True
+            
+        return False
+
+    def draw(self, screen, current_time, alpha=1.0, camera=None):
+        # One blits() batch of cached sprites for the segments inside the
+        # camera's view (the whole board without a camera). Returns the rects
+        # drawn, for dirty-rect display updates. alpha < 1 draws the snake that
+        # far along its last move: each segment slides in from the cell behind it.
+        #
+        # Segments are culled on the packed cells. Neighbouring segments are
+        # one cell apart, so after a segment d cells outside the view the next
+        # d - 1 can't be in it either and are skipped without being looked at:
+        # a long snake mostly off screen costs little more than its visible part.
+        sprites = get_sprites(self.color, self.tail_color)
+        length = len(self.cells)
+        phase = current_time * 0.01
+        if camera:
+            ox, oy = camera.x, camera.y
+            left, top, right, bottom = camera.visible_cells()
+        else:
+            ox = oy = 0
+            left = top = -1
+            right = bottom = PACK_MASK
+        # Bounds in packed coordinates (offset by 1), right / bottom inclusive
+        left += 1
+        top += 1
+        back = (1 - alpha) * CELL_SIZE
+        batch = []
+        cells = iter(self.cells)
+        cell = next(cells, None)
+        i = 0
+        while cell is not None:
+            x, y = cell & PACK_MASK, cell >> PACK_SHIFT
+            out = max(left - x, 0, x - right) + max(top - y, 0, y - bottom)
+            if out:
+                if out > 1:
+                    next(islice(cells, out - 1, out - 1), None)
+                cell = next(cells, None)
+                i += out
+                continue
+            following = next(cells, None)
+            px, py = (x - 1) * CELL_SIZE - ox, (y - 1) * CELL_SIZE - oy
+            if alpha < 1 and following is not None:
+                px += round(((following & PACK_MASK) - x) * back)
+                py += round(((following >> PACK_SHIFT) - y) * back)
+            # Breathing effect for segments
+            rect_size = CELL_SIZE - 2 + math.sin(phase + i * 0.5) * 2
+            offset = int((CELL_SIZE - rect_size) // 2)
+            if i == 0:
+                sprite = sprites.head(self.direction, offset, int(rect_size))
+            else:
+                sprite = sprites.segment(i * GRADIENT_STEPS // length, offset, int(rect_size))
+            batch.append((sprite, (px, py)))
+            cell = following
+            i += 1
+        return screen.blits(batch)
@@ -0,0 +1,188 @@
+# Headless AI tournaments across worker processes.
+#   python tournament.py --games 10000                    AI vs AI
+#   python tournament.py --player greedy --ai field       scripted player vs AI
+#   python tournament.py --player bfs --ai none           solo (classic) games
+# Game i uses seed --seed + i, so any game can be replayed on its own whatever
+# the worker count. One CSV row per game is appended to --output as games finish.
+# With --levels PACK game i plays pack level (seed % pack size) on the pack's board.
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from settings import FPS, AI_SPEED_MULTIPLIER, COLS, ROWS
+from engine import Engine, PLAYER, AI, DIE, FULL
+from ai import ai_move, ai_move_field, ai_move_anytime, PLAN_BUDGET_CELLS
+from scheduler import FixedStep
+from level import LevelPack
+
+RESULTS = "tournament_results.csv"
+FIELDS = ["seed", "player", "ai", "score", "ai_score", "length", "ai_length", "ticks", "ai_deaths", "cause"]
+
+# ========== POLICIES ==========
+# policy(engine, snake, other) -> direction for this tick (None keeps going)
+def field_policy(engine, snake, other):
+    # The in-game AI: shortest path from the incremental distance field
+    ai_move_field(snake, engine.field, engine.ai_rng)
+    return snake.next_direction
+
+def bfs_policy(engine, snake, other):
+    # The original per-tick BFS
+    ai_move(snake, engine.food, engine.obstacles, other.body if other else None, engine.ai_rng,
+            engine.cols, engine.rows)
+    return snake.next_direction
+
+def anytime_policy(engine, snake, other):
+    # Budget-bounded A* with a tail-reachability check; the budget is in
+    # expanded cells, so games stay reproducible
+    ai_move_anytime(snake, engine.food, engine.obstacles, other.body if other else None, rng=engine.ai_rng,
+                    cols=engine.cols, rows=engine.rows, budget_cells=PLAN_BUDGET_CELLS)
+    return snake.next_direction
+
+def greedy_policy(engine, snake, other):
+    # Scripted: the free neighbour closest to the food as the crow flies
+    field = engine.field
+    grid = field.grid
+    head = grid.cell(snake.body[0])
+    fx, fy = engine.food
+    best = None
+    for nxt in field.neighbours[head]:
+        if field.is_free(nxt):
+            x, y = grid.pos(nxt)
+            dist = abs(x - fx) + abs(y - fy)
+            if best is None or dist < best[0]:
+                best = (dist, nxt)
+    if best is None:
+        return None
+    return grid.direction(head, best[1])
+
+POLICIES = {"field": field_policy, "bfs": bfs_policy, "anytime": anytime_policy, "greedy": greedy_policy}
+
+# ========== WORKER ==========
+# Level packs opened by this worker, by path; a mapped pack is shared by
+# every game the worker plays
+packs = {}
+
+def get_pack(path):
+    if path not in packs:
+        packs[path] = LevelPack(path)
+    return packs[path]
+
+def play(seed, player, ai, max_ticks, cols, rows, levels=None):
+    # One game at the in-game pace (ticks scheduled against 60 FPS frames of
+    # simulated time), until the player dies, the board fills or max_ticks
+    level = None
+    if levels:
+        pack = get_pack(levels)
+        cols, rows = pack.cols, pack.rows
+        level = pack[seed % len(pack)]
+    engine = Engine(with_ai=ai is not None, seed=seed, cols=cols, rows=rows, level=level)
+    player_policy = POLICIES[player]
+    ai_policy = POLICIES[ai] if ai else None
+    scheduler = FixedStep()
+    frame = 1000 / FPS
+    ai_deaths = 0
+    cause = "timeout"
+
+    while not engine.over and engine.ticks < max_ticks:
+        rates = {PLAYER: engine.game_speed}
+        if ai_policy:
+            rates[AI] = engine.game_speed * AI_SPEED_MULTIPLIER
+        for snake_id in scheduler.advance(frame, rates):
+            if snake_id == PLAYER:
+                action = player_policy(engine, engine.player, engine.ai_snake)
+            else:
+                action = ai_policy(engine, engine.ai_snake, engine.player)
+            for kind, who, pos in engine.step({snake_id: action}):
+                if kind == DIE and who == AI:
+                    ai_deaths += 1
+                elif kind == DIE:
+                    cause = engine.player.cause
+                elif kind == FULL:
+                    cause = "full"
+            if engine.over:
+                break
+
+    return {
+        "seed": seed, "player": player, "ai": ai or "none",
+        "score": engine.score, "ai_score": engine.ai_score,
+        "length": len(engine.player.body),
+        "ai_length": len(engine.ai_snake.body) if engine.ai_snake else 0,
+        "ticks": engine.ticks, "ai_deaths": ai_deaths, "cause": cause,
+    }
+
+def play_chunk(seeds, player, ai, max_ticks, cols, rows, levels=None):
+    return [play(seed, player, ai, max_ticks, cols, rows, levels) for seed in seeds]
+
+# ========== DRIVER ==========
+def summarize(rows, elapsed):
+    games = len(rows)
+    ticks = sum(row["ticks"] for row in rows)
+    print(f"{games} games, {ticks} ticks in {elapsed:.1f} s: "
+          f"{games / elapsed:.1f} games/s, {ticks / elapsed:.0f} ticks/s")
+    if not games:
+        return
+    print(f"player score  mean {sum(r['score'] for r in rows) / games:8.1f}  "
+          f"max {max(r['score'] for r in rows)}")
+    if rows[0]["ai"] != "none":
+        wins = sum(r["score"] > r["ai_score"] for r in rows)
+        losses = sum(r["score"] < r["ai_score"] for r in rows)
+        print(f"ai score      mean {sum(r['ai_score'] for r in rows) / games:8.1f}  "
+              f"max {max(r['ai_score'] for r in rows)}")
+        print(f"ai deaths     mean {sum(r['ai_deaths'] for r in rows) / games:8.2f}")
+        print(f"player wins {wins}, losses {losses}, draws {games - wins - losses}")
+    causes = Counter(row["cause"] for row in rows)
+    print("end of game   " + ", ".join(f"{cause} {count}" for cause, count in causes.most_common()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many seeded headless games between AI policies")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--player", choices=sorted(POLICIES), default="field", help="policy steering the player snake")
+    parser.add_argument("--ai", choices=sorted(POLICIES) + ["none"], default="field",
+                        help="policy steering the AI snake, none for solo games")
+    parser.add_argument("--cols", type=int, default=COLS, help="board width in cells")
+    parser.add_argument("--rows", type=int, default=ROWS, help="board height in cells")
+    parser.add_argument("--levels", metavar="PACK", help="play the levels of a pack made with level.py (sets the board size)")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="end a game as a timeout after this many ticks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk", type=int, default=16, help="games handed to a worker at a time")
+    parser.add_argument("--output", default=RESULTS, help="CSV file, one row per game")
+    args = parser.parse_args()
+
+    ai = None if args.ai == "none" else args.ai
+    if args.levels:
+        # Fail here rather than in every worker
+        try:
+            pack = LevelPack(args.levels)
+        except (OSError, ValueError) as e:
+            parser.error(f"--levels: {e}")
+        if not pack:
+            parser.error(f"--levels: {args.levels} holds no levels")
+        pack.close()
+    seeds = range(args.seed, args.seed + args.games)
+    chunks = [seeds[i:i + args.chunk] for i in range(0, len(seeds), args.chunk)]
+    rows = []
+    start = time.perf_counter()
+    with open(args.output, "w", newline="") as f, ProcessPoolExecutor(args.workers) as pool:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        futures = [pool.submit(play_chunk, chunk, args.player, ai, args.max_ticks, args.cols, args.rows,
+                               args.levels)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            results = future.result()
+            writer.writerows(results)
+            f.flush()
+            rows.extend(results)
+            print(f"\r{len(rows)}/{args.games} games", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    summarize(rows, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()